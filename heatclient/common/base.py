@@ -18,8 +18,29 @@ Base utilities to build API operation managers and objects on top of.
 """
 
 import copy
+import logging
+import threading
+
 import six
 
+try:
+    from collections import abc as collections_abc
+except ImportError:
+    import collections as collections_abc
+
+from heatclient.common import concurrency
+from heatclient import exc
+
+LOG = logging.getLogger(__name__)
+
+_deepcopy = copy.deepcopy
+
+# Policies for loading the attributes missing from an object on access
+LAZY_LOAD_ALLOW = 'allow'
+LAZY_LOAD_WARN = 'warn'
+LAZY_LOAD_FORBID = 'forbid'
+LAZY_LOAD_POLICIES = (LAZY_LOAD_ALLOW, LAZY_LOAD_WARN, LAZY_LOAD_FORBID)
+
 
 # Python 2.4 compat
 try:
@@ -48,19 +69,130 @@ class Manager(object):
     It provides CRUD operations for these objects.
     """
     resource_class = None
+    # Build listed objects on Records rather than dicts, see Record
+    compact_resources = False
+    # What to do when a missing attribute would load an object
+    lazy_load = LAZY_LOAD_ALLOW
+    # LazyLoadCounter shared by the managers of a client, if any
+    lazy_load_counter = None
 
     def __init__(self, api):
         self.api = api
+        self._record_indexes = {}
 
     def _list(self, url, response_key, obj_class=None, body=None):
         resp, body = self.api.json_request('GET', url)
+        return self._objects(body[response_key], obj_class)
 
+    def _objects(self, data, obj_class=None):
+        """Build the objects of the items of a list response."""
         if obj_class is None:
             obj_class = self.resource_class
-
-        data = body[response_key]
+        if self.compact_resources:
+            data = self._records(data)
         return [obj_class(self, res, loaded=True) for res in data if res]
 
+    def _list_iter(self, url, response_key, obj_class=None):
+        """Iterate over the objects of a list response as they arrive.
+
+        Unlike _list, the response body is decoded incrementally, so only
+        the objects built so far are held in memory.
+        """
+        resp, data = self.api.json_stream_request('GET', url, response_key)
+
+        if obj_class is None:
+            obj_class = self.resource_class
+        if self.compact_resources:
+            data = self._records(data)
+
+        for res in data:
+            if res:
+                yield obj_class(self, res, loaded=True)
+
+    def _paginate(self, fetch_page, params, limit=None, prefetch=0):
+        """Iterate over the items of a paginated list.
+
+        fetch_page is called with the query parameters of each page and
+        returns the items of that page. When params has a 'limit', i.e. a
+        page size, pages are requested one after another, with the id of
+        the last item as the marker, until a page comes back short.
+
+        :param fetch_page: callable returning the items of a page
+        :param params: query parameters of the first page
+        :param limit: maximum number of items to return
+        :param prefetch: number of pages to fetch ahead of the caller on a
+                         background thread, 0 to fetch each page on demand
+        """
+        pages = self._pages(fetch_page, params, limit)
+        if prefetch:
+            pages = concurrency.read_ahead(pages, prefetch)
+        seen = 0
+        for page in pages:
+            for item in page:
+                seen += 1
+                if limit is not None and seen > limit:
+                    return
+                yield item
+
+    def _pages(self, fetch_page, params, limit=None):
+        params = dict(params)
+        page_size = params.get('limit')
+        seen = 0
+        while True:
+            items = fetch_page(params)
+            yield items
+
+            seen += len(items)
+            if not (page_size and len(items) == page_size and
+                    (limit is None or seen < limit)):
+                return
+            params['marker'] = items[-1].id
+
+    def _map(self, fn, items):
+        """Call fn on each item concurrently on the client's worker threads.
+
+        The results are returned in the order of items. The call for one
+        item failing does not abort the others; the exception it raised
+        is returned in place of its result.
+        """
+        futures = [self.api.thread_pool.submit(fn, item) for item in items]
+        results = []
+        for future in futures:
+            error = future.exception()
+            results.append(future.result() if error is None else error)
+        return results
+
+    def load_all(self, resources):
+        """Load the full details of many objects concurrently.
+
+        Objects which are loaded already are not requested again.
+
+        :param resources: objects returned by this manager
+        :rtype: list of the objects, in the order of resources, with the
+                exception raised in place of each object which could not
+                be loaded
+        """
+        def load(resource):
+            if not resource.is_loaded():
+                resource.get()
+            return resource
+        return self._map(load, resources)
+
+    def _records(self, items):
+        """Convert the dicts among items to Records.
+
+        Records of dicts with the same keys share one key index.
+        """
+        for item in items:
+            if isinstance(item, dict) and item:
+                keys = tuple(item)
+                index = self._record_indexes.get(keys)
+                if index is None:
+                    index = dict((k, i) for i, k in enumerate(keys))
+                    index = self._record_indexes.setdefault(keys, index)
+                item = Record(index, tuple(item[k] for k in keys))
+            yield item
+
     def _delete(self, url):
         self.api.raw_request('DELETE', url)
 
@@ -71,6 +203,128 @@ class Manager(object):
             return self.resource_class(self, body[response_key])
 
 
+class _ReadOnlyMapping(object):
+    """Base of the read-only mappings below.
+
+    Unlike collections.Mapping on Python 2, it declares no instance
+    attributes, so subclasses with __slots__ have no __dict__.
+    Subclasses implement __getitem__, __iter__ and __len__.
+    """
+    __slots__ = ()
+    __hash__ = None
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def __eq__(self, other):
+        if not isinstance(other, collections_abc.Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+
+collections_abc.Mapping.register(_ReadOnlyMapping)
+
+
+class Record(_ReadOnlyMapping):
+    """A read-only mapping which stores its values in a tuple.
+
+    The mapping of keys to positions in the tuple is shared by all the
+    records with the same keys, so a record costs little more than its
+    values. Used in place of the dict of a listed Resource when the
+    manager has compact_resources set.
+
+    :param index: dict of keys to positions in values
+    :param values: tuple of values
+    """
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LazyLoadCounter(object):
+    """Count the objects of a client loaded by attribute access.
+
+    The counts are kept per object class name, e.g. counts['Stack'].
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+class DictView(_ReadOnlyMapping):
+    """A read-only view of a dict."""
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return repr(self._data)
+
+
 class Resource(object):
     """A resource represents a particular instance of an object.
 
@@ -87,13 +341,25 @@ class Resource(object):
         self._loaded = loaded
 
     def _add_details(self, info):
+        # The fields of _info are only read from it when first accessed
+        if info is self._info:
+            return
         for (k, v) in six.iteritems(info):
             setattr(self, k, v)
 
     def __getattr__(self, k):
         if k not in self.__dict__:
+            info = self.__dict__.get('_info')
+            if isinstance(info, (dict, Record)) and k in info:
+                value = info[k]
+                # Records are compact already, dict fields are cached
+                if not isinstance(info, Record):
+                    self.__dict__[k] = value
+                return value
+
             #NOTE(bcwaldon): disallow lazy-loading if already loaded once
             if not self.is_loaded():
+                self._check_lazy_load(k)
                 self.get()
                 return self.__getattr__(k)
 
@@ -101,8 +367,23 @@ class Resource(object):
         else:
             return self.__dict__[k]
 
+    def _check_lazy_load(self, k):
+        policy = getattr(self.manager, 'lazy_load', LAZY_LOAD_ALLOW)
+        name = self.__class__.__name__
+        if policy == LAZY_LOAD_FORBID:
+            raise exc.LazyLoadForbidden(
+                'Loading %s to get attribute %s is forbidden' % (name, k))
+        if policy == LAZY_LOAD_WARN:
+            LOG.warning('Loading %s to get attribute %s', name, k)
+        counter = getattr(self.manager, 'lazy_load_counter', None)
+        if counter is not None:
+            counter.add(name)
+
     def __repr__(self):
-        reprkeys = sorted(k for k in self.__dict__.keys()
+        keys = set(self.__dict__)
+        if isinstance(self._info, (dict, Record)):
+            keys.update(self._info)
+        reprkeys = sorted(k for k in keys
                           if k[0] != '_' and k != 'manager')
         info = ", ".join("%s=%s" % (k, getattr(self, k)) for k in reprkeys)
         return "<%s %s>" % (self.__class__.__name__, info)
@@ -130,5 +411,18 @@ class Resource(object):
     def set_loaded(self, val):
         self._loaded = val
 
-    def to_dict(self):
-        return copy.deepcopy(self._info)
+    def to_dict(self, copy=True):
+        """Return the fields of the object.
+
+        :param copy: if False, return a read-only view of the fields rather
+                     than a deep copy. Nested values are shared with the
+                     object and must not be modified.
+        """
+        info = self._info
+        if not copy:
+            if isinstance(info, dict):
+                return DictView(info)
+            return info
+        if isinstance(info, Record):
+            info = dict(info)
+        return _deepcopy(info)
@@ -0,0 +1,235 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client-side caches.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    """A thread-safe, size-bounded, least recently used cache.
+
+    Lookups are counted in the hits and misses attributes.
+
+    :param maxsize: maximum number of entries kept in the cache
+    :param ttl: number of seconds after which an entry expires, or None
+                if entries never expire
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (value, expires, tick of the last use)
+        self._data = {}
+        # (tick, key) of each use, oldest first. Uses older than the last
+        # one of their key are skipped when evicting.
+        self._uses = collections.deque()
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires, tick = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._use(key, value, expires)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires = None
+        if self.ttl is not None:
+            expires = time.time() + self.ttl
+        with self._lock:
+            self._use(key, value, expires)
+            while len(self._data) > self.maxsize:
+                tick, key = self._uses.popleft()
+                entry = self._data.get(key)
+                if entry is not None and entry[2] == tick:
+                    del self._data[key]
+
+    def _use(self, key, value, expires):
+        self._tick += 1
+        self._data[key] = (value, expires, self._tick)
+        self._uses.append((self._tick, key))
+        if len(self._uses) > 2 * len(self._data) + 16:
+            # Drop the uses superseded by later ones
+            self._uses = collections.deque(
+                (tick, key) for tick, key in self._uses
+                if key in self._data and self._data[key][2] == tick)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            return entry[0]
+
+    def pop_matching(self, predicate):
+        """Remove the entries for which predicate(key, value) is true."""
+        with self._lock:
+            for key, entry in list(self._data.items()):
+                if predicate(key, entry[0]):
+                    del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._uses.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def user_cache_dir():
+    """Return the directory for the heatclient caches of the user.
+
+    This is $XDG_CACHE_HOME/heatclient, or ~/.cache/heatclient when
+    XDG_CACHE_HOME is not set.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'heatclient')
+
+
+class DiskCache(object):
+    """A cache of JSON documents kept in files, shared between processes.
+
+    Each entry is stored in its own file, named after a hash of its key.
+    Entries are written to a temporary file which is then renamed, so
+    readers never see a partial entry. Failing to read or write an entry
+    is treated as a cache miss. A key may also have raw bytes stored
+    alongside its document, see get_bytes and set_bytes.
+
+    :param directory: directory of the cache files, created on first write
+    :param ttl: number of seconds after which an entry expires, or None
+                if entries never expire
+    :param max_entries: number of keys kept, the least recently written
+                        are removed beyond it, or None for no limit
+    """
+    _suffixes = ('.json', '.data')
+
+    def __init__(self, directory, ttl=None, max_entries=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _path(self, key, suffix='.json'):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + suffix)
+
+    def get(self, key, default=None):
+        return self._read(key, '.json', 'r', json.load, default)
+
+    def get_bytes(self, key, default=None):
+        return self._read(key, '.data', 'rb', lambda f: f.read(), default)
+
+    def _read(self, key, suffix, mode, load, default):
+        path = self._path(key, suffix)
+        try:
+            if (self.ttl is not None and
+                    time.time() - os.path.getmtime(path) > self.ttl):
+                self.pop(key)
+                return default
+            with open(path, mode) as f:
+                return load(f)
+        except (IOError, OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        self._write(key, '.json', 'w',
+                    lambda f: json.dump(value, f, separators=(',', ':')))
+
+    def set_bytes(self, key, data):
+        self._write(key, '.data', 'wb', lambda f: f.write(data))
+
+    def _write(self, key, suffix, mode, dump):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp',
+                                            dir=self.directory)
+        except (IOError, OSError) as e:
+            LOG.debug('Could not write to cache %s: %s', self.directory, e)
+            return
+        try:
+            with os.fdopen(fd, mode) as f:
+                dump(f)
+            os.rename(tmp_path, self._path(key, suffix))
+        except (IOError, OSError, TypeError, ValueError) as e:
+            LOG.debug('Could not write to cache %s: %s', self.directory, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        if self.max_entries is not None:
+            self._prune()
+
+    def _prune(self):
+        """Remove the least recently written keys beyond max_entries."""
+        written = {}
+        for name in self._names():
+            digest = os.path.splitext(name)[0]
+            try:
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            written[digest] = max(mtime, written.get(digest, mtime))
+        if len(written) <= self.max_entries:
+            return
+        oldest = sorted(written, key=written.get)
+        for digest in oldest[:len(written) - self.max_entries]:
+            for suffix in self._suffixes:
+                self._remove(os.path.join(self.directory, digest + suffix))
+
+    def _names(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [name for name in names if name.endswith(self._suffixes)]
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def pop(self, key):
+        for suffix in self._suffixes:
+            self._remove(self._path(key, suffix))
+
+    def clear(self):
+        """Remove all the entries of the cache."""
+        for name in self._names():
+            self._remove(os.path.join(self.directory, name))
@@ -0,0 +1,212 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Utilities to keep many API requests in flight at once.
+"""
+
+import sys
+import threading
+import types
+
+import six
+from six.moves import queue
+
+DEFAULT_MAX_WORKERS = 10
+
+_DONE = object()
+
+
+class Future(object):
+    """The pending result of a call submitted to a ThreadPool."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the call to complete and return its result.
+
+        If the call raised an exception, that exception is raised again
+        here with its original traceback.
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            six.reraise(*self._exc_info)
+        return self._result
+
+    def exception(self, timeout=None):
+        """Wait for the call to complete and return what it raised."""
+        self._wait(timeout)
+        if self._exc_info is not None:
+            return self._exc_info[1]
+
+    def _wait(self, timeout):
+        self._done.wait(timeout)
+        if not self._done.is_set():
+            raise RuntimeError('Timed out waiting for result')
+
+    def _set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def _set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._done.set()
+
+
+class ThreadPool(object):
+    """A bounded pool of daemon worker threads.
+
+    Worker threads are only started when calls are submitted, up to
+    max_workers of them, so an unused pool costs nothing. Calls submitted
+    from one of the workers run at once on that worker: queueing them
+    would deadlock once every worker waits on calls behind it. A pool
+    with max_workers below 1 runs every call at once in the caller.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._queue = queue.Queue()
+        self._workers = []
+        self._idle = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) and return its Future."""
+        future = Future()
+        if self.max_workers < 1 or getattr(self._local, 'worker', False):
+            self._run(future, fn, args, kwargs)
+            return future
+        with self._lock:
+            self._queue.put((future, fn, args, kwargs))
+            if not self._idle and len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+            else:
+                self._idle -= 1
+        return future
+
+    def map(self, fn, *iterables):
+        """Return the Futures of fn called on each item, in input order."""
+        return [self.submit(fn, *args) for args in six.moves.zip(*iterables)]
+
+    def shutdown(self):
+        """Stop the worker threads once the submitted calls are done."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = 0
+            for worker in workers:
+                self._queue.put(None)
+        for worker in workers:
+            worker.join()
+
+    def _work(self):
+        self._local.worker = True
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._run(*item)
+            with self._lock:
+                self._idle += 1
+
+    @staticmethod
+    def _run(future, fn, args, kwargs):
+        try:
+            future._set_result(fn(*args, **kwargs))
+        except Exception:
+            future._set_exc_info(sys.exc_info())
+
+
+class FutureProxy(object):
+    """Wrap an object so that its method calls run on a ThreadPool.
+
+    Attributes which are not callable, such as the managers of a client,
+    are wrapped in turn, so client.futures.stacks.get(stack_id) returns a
+    Future of the stack. Calls returning a generator, such as the list
+    methods of the managers, are run to the end on the worker, and their
+    Future holds a list. Exceptions from heatclient.exc are raised by
+    Future.result().
+    """
+
+    def __init__(self, target, pool):
+        self._target = target
+        self._pool = pool
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return FutureProxy(attr, self._pool)
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if isinstance(result, types.GeneratorType):
+                return list(result)
+            return result
+
+        def submit(*args, **kwargs):
+            return self._pool.submit(call, *args, **kwargs)
+        return submit
+
+
+def read_ahead(iterable, size):
+    """Iterate over iterable while a background thread runs ahead of it.
+
+    Up to size items are produced before the caller asks for them, so the
+    work of producing the next items, such as fetching the next page of a
+    list, overlaps with the caller's handling of the current one. An
+    exception raised while producing an item is raised by the caller's
+    next() call. Closing the returned generator stops the thread.
+    """
+    items = queue.Queue(size)
+    stopped = threading.Event()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception:
+            put((None, sys.exc_info()))
+        else:
+            put((_DONE, None))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            item, exc_info = items.get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -13,11 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import copy
+import decimal
 import logging
 import os
 import posixpath
+import select
 import socket
+import threading
+import time
 
 from heatclient.openstack.common.py3kcompat import urlutils
 from six.moves import http_client as httplib
@@ -33,7 +36,14 @@ try:
 except ImportError:
     import simplejson as json
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 
+from heatclient.common import cache
+from heatclient.common import concurrency
 from heatclient import exc
 
 
@@ -42,6 +52,15 @@ if not LOG.handlers:
     LOG.addHandler(logging.StreamHandler())
 USER_AGENT = 'python-heatclient'
 CHUNKSIZE = 1024 * 64  # 64kB
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+DEFAULT_REDIRECT_CACHE_SIZE = 32
+# Headers which distinguish the responses to GET requests of one URL
+RESPONSE_CACHE_SCOPE_HEADERS = ('X-Auth-Token', 'X-Auth-User', 'X-Auth-Url',
+                                'X-Region-Name', 'Accept')
+MAX_REDIRECTS = 5
+# Methods which can be sent again without changing the outcome
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'DELETE')
 
 
 class HTTPClient(object):
@@ -54,8 +73,30 @@ class HTTPClient(object):
         self.password = kwargs.get('password')
         self.region_name = kwargs.get('region_name')
         self.include_pass = kwargs.get('include_pass')
+        self.log_body_limit = kwargs.get('log_body_limit')
+        self._headers = (None, None, None)
+        self.thread_pool = concurrency.ThreadPool(int(
+            kwargs.get('max_workers', concurrency.DEFAULT_MAX_WORKERS)))
+        self.redirect_cache = cache.LRUCache(int(
+            kwargs.get('redirect_cache_size', DEFAULT_REDIRECT_CACHE_SIZE)))
+        response_cache_size = int(kwargs.get('response_cache_size', 0))
+        if response_cache_size > 0:
+            self.response_cache = ResponseCache(response_cache_size)
+        else:
+            self.response_cache = None
         self.connection_params = self.get_connection_params(endpoint, **kwargs)
 
+        pool_size = int(kwargs.get('pool_size', DEFAULT_POOL_SIZE))
+        if pool_size > 0:
+            self.connection_pool = ConnectionPool(
+                pool_size, float(kwargs.get('pool_idle_timeout',
+                                            DEFAULT_POOL_IDLE_TIMEOUT)))
+        else:
+            self.connection_pool = None
+        _class, _args, _kwargs = self.connection_params
+        self.connection_key = (_class, _args[0], _args[1],
+                               tuple(sorted(_kwargs.items())))
+
     @staticmethod
     def get_connection_params(endpoint, **kwargs):
         parts = urlutils.urlparse(endpoint)
@@ -69,6 +110,11 @@ class HTTPClient(object):
             _kwargs['cert_file'] = kwargs.get('cert_file', None)
             _kwargs['key_file'] = kwargs.get('key_file', None)
             _kwargs['insecure'] = kwargs.get('insecure', False)
+            _kwargs['tls_context'] = TLSContext(
+                _kwargs['ca_file'] or
+                VerifiedHTTPSConnection.get_system_ca_file(),
+                _kwargs['cert_file'], _kwargs['key_file'],
+                _kwargs['insecure'])
         elif parts.scheme == 'http':
             _class = httplib.HTTPConnection
         else:
@@ -85,7 +131,36 @@ class HTTPClient(object):
         except httplib.InvalidURL:
             raise exc.InvalidEndpoint()
 
+    def close(self):
+        """Stop the worker threads and close all idle connections."""
+        self.thread_pool.shutdown()
+        if self.connection_pool is not None:
+            self.connection_pool.clear()
+
+    def _get_pooled_connection(self):
+        """Return a (connection, reused) tuple.
+
+        An idle keep-alive connection is taken from the pool when one is
+        available, otherwise a new connection is created.
+        """
+        if self.connection_pool is not None:
+            conn = self.connection_pool.get(self.connection_key)
+            if conn is not None:
+                return conn, True
+        return self.get_connection(), False
+
+    def _release_connection(self, conn, resp):
+        """Return conn to the pool if the server kept it open."""
+        # NOTE: only httplib responses which have been fully read and
+        # which the server did not ask to close are eligible for reuse.
+        if (self.connection_pool is not None and
+                not getattr(resp, 'will_close', True)):
+            self.connection_pool.put(self.connection_key, conn)
+
     def log_curl_request(self, method, url, kwargs):
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return
+
         curl = ['curl -i -X %s' % method]
 
         for (key, value) in kwargs['headers'].items():
@@ -106,64 +181,105 @@ class HTTPClient(object):
             curl.append('-k')
 
         if 'body' in kwargs:
-            curl.append('-d \'%s\'' % kwargs['body'])
+            body = _truncate(kwargs['body'], self.log_body_limit)
+            curl.append('-d \'%s\'' % body)
 
         curl.append('%s%s' % (self.endpoint, url))
         LOG.debug(' '.join(curl))
 
     @staticmethod
-    def log_http_response(resp, body=None):
+    def log_http_response(resp, body=None, body_limit=None):
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return
+
         status = (resp.version / 10.0, resp.status, resp.reason)
         dump = ['\nHTTP/%.1f %s %s' % status]
         dump.extend(['%s: %s' % (k, v) for k, v in resp.getheaders()])
         dump.append('')
         if body:
-            dump.extend([body, ''])
+            dump.extend([_truncate(body, body_limit), ''])
         LOG.debug('\n'.join(dump))
 
     def _http_request(self, url, method, **kwargs):
         """Send an http request with the specified characteristics.
 
         Wrapper around httplib.HTTP(S)Connection.request to handle tasks such
-        as setting headers and error handling.
+        as setting headers, following redirects and error handling.
+
+        When stream is True, the body of a successful response is not read
+        up front; an iterator over the body chunks is returned instead of
+        the body string.
         """
-        # Copy the kwargs so we can reuse the original in case of redirects
-        kwargs['headers'] = copy.deepcopy(kwargs.get('headers', {}))
-        kwargs['headers'].setdefault('User-Agent', USER_AGENT)
-        if self.auth_token:
-            kwargs['headers'].setdefault('X-Auth-Token', self.auth_token)
-        else:
-            kwargs['headers'].update(self.credentials_headers())
-        if self.auth_url:
-            kwargs['headers'].setdefault('X-Auth-Url', self.auth_url)
-        if self.region_name:
-            kwargs['headers'].setdefault('X-Region-Name', self.region_name)
-        if self.include_pass and not 'X-Auth-Key' in kwargs['headers']:
-            kwargs['headers'].update(self.credentials_headers())
+        stream = kwargs.pop('stream', False)
+        # Overlay the request headers on the per-client base headers,
+        # leaving the caller's dict untouched
+        defaults, creds = self._base_headers()
+        headers = dict(defaults)
+        headers.update(kwargs.get('headers', {}))
+        if creds and (not self.auth_token or 'X-Auth-Key' not in headers):
+            headers.update(creds)
+        kwargs['headers'] = headers
+
+        # Revalidate the cached response to a GET instead of downloading
+        # the body again
+        cache_key = cached = None
+        if self.response_cache is not None and method == 'GET' and \
+                not stream:
+            cache_key = self.response_cache.key(url, headers)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                headers.update(cached.validators())
+
+        # Go straight to the target of a known permanent redirect
+        url = self.redirect_cache.get(url, url)
+        # URLs which were permanently redirected to the current one
+        permanent = []
+
+        for redirects in range(MAX_REDIRECTS + 1):
+            self.log_curl_request(method, url, kwargs)
+            conn, resp = self._send_request(url, method, kwargs)
+
+            if stream and 200 <= resp.status < 300:
+                self.log_http_response(resp)
+                return resp, self._stream_body(conn, resp)
+
+            body_iter = ResponseBodyIterator(resp)
+            body_str = ''.join([chunk for chunk in body_iter])
+            self._release_connection(conn, resp)
+            self.log_http_response(resp, body_str, self.log_body_limit)
+
+            if resp.status not in (301, 302, 305):
+                break
 
-        self.log_curl_request(method, url, kwargs)
-        conn = self.get_connection()
+            # Redirected. Reissue the request to the new location.
+            location = resp.getheader('location', None)
+            if location is None:
+                message = "Location not returned with 302"
+                raise exc.InvalidEndpoint(message=message)
+            elif location.startswith(self.endpoint):
+                # shave off the endpoint, it will be prepended on request
+                location = location[len(self.endpoint):]
+            else:
+                message = "Prohibited endpoint redirect %s" % location
+                raise exc.InvalidEndpoint(message=message)
 
-        try:
-            conn_params = self.connection_params[1][2]
-            conn_url = posixpath.normpath('%s/%s' % (conn_params, url))
-            conn.request(method, conn_url, **kwargs)
-            resp = conn.getresponse()
-        except socket.gaierror as e:
-            message = ("Error finding address for %(url)s: %(e)s" %
-                       {'url': url, 'e': e})
+            if resp.status == 301 and len(permanent) == redirects:
+                permanent.append(url)
+                for permanent_url in permanent:
+                    self.redirect_cache.set(permanent_url, location)
+            url = location
+        else:
+            message = "Too many redirects, last location %s" % url
             raise exc.InvalidEndpoint(message=message)
-        except (socket.error, socket.timeout) as e:
-            endpoint = self.endpoint
-            message = ("Error communicating with %(endpoint)s %(e)s" %
-                       {'endpoint': endpoint, 'e': e})
-            raise exc.CommunicationError(message=message)
 
-        body_iter = ResponseBodyIterator(resp)
-        body_str = ''.join([chunk for chunk in body_iter])
-        self.log_http_response(resp, body_str)
+        if cache_key is not None:
+            if resp.status == 304 and cached is not None:
+                self.response_cache.revalidated(cached)
+                return cached, cached.body
+            if resp.status == 200:
+                self.response_cache.store(cache_key, resp, body_str)
 
-        if not 'X-Auth-Key' in kwargs['headers'] and \
+        if 'X-Auth-Key' not in kwargs['headers'] and \
                 (resp.status == 401 or
                 (resp.status == 500 and "(HTTP 401)" in body_str)):
             raise exc.HTTPUnauthorized("Authentication failed. Please try"
@@ -173,24 +289,78 @@ class HTTPClient(object):
                                        % body_str)
         elif 400 <= resp.status < 600:
             raise exc.from_response(resp, body_str)
-        elif resp.status in (301, 302, 305):
-            # Redirected. Reissue the request to the new location.
-            location = resp.getheader('location', None)
-            if location is None:
-                message = "Location not returned with 302"
-                raise exc.InvalidEndpoint(message=message)
-            elif location.startswith(self.endpoint):
-                # shave off the endpoint, it will be prepended when we recurse
-                location = location[len(self.endpoint):]
-            else:
-                message = "Prohibited endpoint redirect %s" % location
-                raise exc.InvalidEndpoint(message=message)
-            return self._http_request(location, method, **kwargs)
         elif resp.status == 300:
             raise exc.from_response(resp, body_str)
 
         return resp, body_str
 
+    def _send_request(self, url, method, kwargs):
+        """Send a single request and return the connection and response."""
+        conn, reused = self._get_pooled_connection()
+
+        try:
+            conn_params = self.connection_params[1][2]
+            conn_url = posixpath.normpath('%s/%s' % (conn_params, url))
+            sent = False
+            try:
+                conn.request(method, conn_url, **kwargs)
+                sent = True
+                resp = conn.getresponse()
+            except socket.timeout:
+                # A timeout does not mean the connection went stale, and
+                # a retry would make the caller wait twice as long
+                raise
+            except (socket.error, httplib.HTTPException):
+                # The server may have closed an idle keep-alive connection,
+                # retry once on a fresh connection. Once the request is
+                # sent the server may have acted on it, so only requests
+                # which are safe to repeat are retried then.
+                if not reused or (sent and
+                                  method not in IDEMPOTENT_METHODS):
+                    raise
+                conn.close()
+                conn = self.get_connection()
+                conn.request(method, conn_url, **kwargs)
+                resp = conn.getresponse()
+        except socket.gaierror as e:
+            message = ("Error finding address for %(url)s: %(e)s" %
+                       {'url': url, 'e': e})
+            raise exc.InvalidEndpoint(message=message)
+        except (socket.error, socket.timeout, httplib.HTTPException) as e:
+            endpoint = self.endpoint
+            message = ("Error communicating with %(endpoint)s %(e)s" %
+                       {'endpoint': endpoint, 'e': e})
+            raise exc.CommunicationError(message=message)
+
+        return conn, resp
+
+    def _stream_body(self, conn, resp):
+        for chunk in ResponseBodyIterator(resp):
+            yield chunk
+        self._release_connection(conn, resp)
+
+    def _base_headers(self):
+        """Return the default and credentials headers of this client.
+
+        They are only rebuilt when the token or credentials change, and
+        must not be modified by the caller.
+        """
+        state = (self.auth_token, self.username, self.password,
+                 self.auth_url, self.region_name, self.include_pass)
+        if self._headers[0] != state:
+            defaults = {'User-Agent': USER_AGENT}
+            if self.auth_token:
+                defaults['X-Auth-Token'] = self.auth_token
+            if self.auth_url:
+                defaults['X-Auth-Url'] = self.auth_url
+            if self.region_name:
+                defaults['X-Region-Name'] = self.region_name
+            creds = None
+            if not self.auth_token or self.include_pass:
+                creds = self.credentials_headers()
+            self._headers = (state, defaults, creds)
+        return self._headers[1:]
+
     def credentials_headers(self):
         creds = {}
         if self.username:
@@ -220,6 +390,34 @@ class HTTPClient(object):
 
         return resp, body
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        """Send a JSON request and iterate over the list at response_key.
+
+        When ijson is available the items of the list are decoded
+        incrementally as the response body arrives, so neither the raw
+        body nor the whole decoded document is held in memory. Otherwise
+        the body is decoded in one pass once it has been read.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type', 'application/json')
+        kwargs['headers'].setdefault('Accept', 'application/json')
+
+        if 'body' in kwargs:
+            kwargs['body'] = json.dumps(kwargs['body'])
+
+        resp, body_iter = self._http_request(url, method, stream=True,
+                                             **kwargs)
+
+        if 'application/json' not in resp.getheader('content-type', ''):
+            for chunk in body_iter:
+                pass
+            return resp, iter([])
+        if ijson is not None:
+            return resp, _ijson_items(ResponseBodyReader(body_iter),
+                                      '%s.item' % response_key)
+        body = json.loads(''.join(body_iter))
+        return resp, iter(body[response_key])
+
     def raw_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type',
@@ -227,6 +425,249 @@ class HTTPClient(object):
         return self._http_request(url, method, **kwargs)
 
 
+def _truncate(body, limit):
+    """Truncate body to limit characters for logging."""
+    if limit is None or len(body) <= limit:
+        return body
+    return '%s... (%d bytes truncated)' % (body[:limit], len(body) - limit)
+
+
+def _ijson_items(fileobj, prefix):
+    # NOTE: ijson < 3.1 decodes numbers with a fraction as Decimal and has
+    # no use_float argument, so the items are always converted here
+    return (_decimals_to_float(item)
+            for item in ijson.items(fileobj, prefix))
+
+
+def _decimals_to_float(obj):
+    if isinstance(obj, dict):
+        return dict((k, _decimals_to_float(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return [_decimals_to_float(v) for v in obj]
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return obj
+
+
+class ResponseCache(object):
+    """An LRU cache of the responses to GET requests.
+
+    Only responses with an ETag or Last-Modified header are kept. They
+    are revalidated with a conditional request, and the cached response
+    is used when the server answers 304 Not Modified.
+
+    The entries are keyed by URL and by the headers which identify the
+    user and the representation. hits counts the responses served from
+    the cache, misses the responses downloaded in full and bytes_saved
+    the size of the bodies which were not downloaded again.
+    """
+
+    def __init__(self, maxsize):
+        self._entries = cache.LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def key(url, headers):
+        return (url,) + tuple(headers.get(h)
+                              for h in RESPONSE_CACHE_SCOPE_HEADERS)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def store(self, key, resp, body):
+        """Cache resp if it carries a validator, otherwise drop key."""
+        with self._lock:
+            self.misses += 1
+        cached = CachedResponse(resp, body)
+        if cached.validators():
+            self._entries.set(key, cached)
+        else:
+            self._entries.pop(key)
+
+    def revalidated(self, cached):
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(cached.body)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedResponse(object):
+    """A copy of a response, to be returned in place of a 304."""
+
+    def __init__(self, resp, body):
+        self.status = resp.status
+        self.reason = resp.reason
+        self.version = resp.version
+        self.body = body
+        self._headers = resp.getheaders()
+
+    def getheader(self, name, default=None):
+        name = name.lower()
+        for key, value in self._headers:
+            if key.lower() == name:
+                return value
+        return default
+
+    def getheaders(self):
+        return list(self._headers)
+
+    def validators(self):
+        """Return the headers of a conditional request for the response."""
+        validators = {}
+        etag = self.getheader('etag')
+        if etag:
+            validators['If-None-Match'] = etag
+        last_modified = self.getheader('last-modified')
+        if last_modified:
+            validators['If-Modified-Since'] = last_modified
+        return validators
+
+
+class ConnectionPool(object):
+    """A bounded, thread-safe pool of idle keep-alive connections.
+
+    Idle connections are kept per connection key, which identifies the
+    scheme, host, port and TLS parameters of the connection. At most
+    ``maxsize`` idle connections are kept for each key, and connections
+    which have been idle for longer than ``idle_timeout`` seconds or which
+    have been closed by the server are discarded.
+    """
+
+    def __init__(self, maxsize=DEFAULT_POOL_SIZE,
+                 idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return an idle connection for key, or None if there is none."""
+        expired = []
+        conn = None
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, released = idle.pop()
+                if (now - released > self.idle_timeout or
+                        self._is_dropped(candidate)):
+                    expired.append(candidate)
+                else:
+                    conn = candidate
+                    break
+        for candidate in expired:
+            candidate.close()
+        return conn
+
+    def put(self, key, conn):
+        """Return conn to the pool, closing it if the pool is full."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def clear(self):
+        """Close and forget all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, released in conns:
+                conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(conns) for conns in self._idle.values())
+
+    @staticmethod
+    def _is_dropped(conn):
+        """Return True if the server closed the idle connection."""
+        sock = getattr(conn, 'sock', None)
+        if sock is None:
+            return True
+        try:
+            # An idle keep-alive socket should have nothing to read, so
+            # readability means EOF or unexpected data from the server.
+            readable, _w, _x = select.select([sock], [], [], 0.0)
+        except (select.error, socket.error, ValueError):
+            return True
+        return bool(readable)
+
+
+class TLSContext(object):
+    """TLS configuration shared by all the connections of a client.
+
+    The SSLContext, with the CA bundle and the client certificate loaded,
+    is built once on first use, so new connections do not read and parse
+    the certificates again. Each connection still does a full handshake:
+    the ssl module of Python 2 can not resume a TLS session.
+    """
+
+    def __init__(self, ca_file=None, cert_file=None, key_file=None,
+                 insecure=False):
+        self.ca_file = ca_file
+        self.cert_file = cert_file
+        self.key_file = key_file
+        self.insecure = insecure
+        self._context = None
+        self._lock = threading.Lock()
+
+    @property
+    def context(self):
+        with self._lock:
+            if self._context is None:
+                self._context = self._create_context()
+            return self._context
+
+    def _create_context(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        if self.insecure is True:
+            context.verify_mode = ssl.CERT_NONE
+        else:
+            context.verify_mode = ssl.CERT_REQUIRED
+            if self.ca_file:
+                context.load_verify_locations(self.ca_file)
+            else:
+                context.load_default_certs()
+
+        if self.cert_file:
+            context.load_cert_chain(self.cert_file, self.key_file)
+        return context
+
+    def wrap_socket(self, sock, server_hostname=None):
+        """Wrap sock with the shared SSLContext."""
+        if not hasattr(ssl, 'SSLContext'):
+            # NOTE: Python < 2.7.9 has no SSLContext, so every connection
+            # has to load the certificates and do a full handshake.
+            return ssl.wrap_socket(sock, **self._wrap_socket_kwargs())
+
+        kwargs = {}
+        if server_hostname and getattr(ssl, 'HAS_SNI', False):
+            kwargs['server_hostname'] = server_hostname
+        return self.context.wrap_socket(sock, **kwargs)
+
+    def _wrap_socket_kwargs(self):
+        if self.insecure is True:
+            kwargs = {'cert_reqs': ssl.CERT_NONE}
+        else:
+            kwargs = {'cert_reqs': ssl.CERT_REQUIRED, 'ca_certs': self.ca_file}
+
+        if self.cert_file:
+            kwargs['certfile'] = self.cert_file
+            if self.key_file:
+                kwargs['keyfile'] = self.key_file
+        return kwargs
+
+
 class VerifiedHTTPSConnection(httplib.HTTPSConnection):
     """httplib-compatibile connection using client-side SSL authentication
 
@@ -235,7 +676,8 @@ class VerifiedHTTPSConnection(httplib.HTTPSConnection):
     """
 
     def __init__(self, host, port, key_file=None, cert_file=None,
-                 ca_file=None, timeout=None, insecure=False):
+                 ca_file=None, timeout=None, insecure=False,
+                 tls_context=None):
         httplib.HTTPSConnection.__init__(self, host, port, key_file=key_file,
                                          cert_file=cert_file)
         self.key_file = key_file
@@ -246,15 +688,18 @@ class VerifiedHTTPSConnection(httplib.HTTPSConnection):
             self.ca_file = self.get_system_ca_file()
         self.timeout = timeout
         self.insecure = insecure
+        if tls_context is None:
+            tls_context = TLSContext(self.ca_file, self.cert_file,
+                                     self.key_file, self.insecure)
+        self.tls_context = tls_context
 
     def connect(self):
         """Connect to a host on a given (SSL) port.
         If ca_file is pointing somewhere, use it to check Server Certificate.
 
         Redefined/copied and extended from httplib.py:1105 (Python 2.6.x).
-        This is needed to pass cert_reqs=ssl.CERT_REQUIRED as parameter to
-        ssl.wrap_socket(), which forces SSL to check server certificate against
-        our client certificate.
+        The socket is wrapped by the shared TLSContext, which checks the
+        server certificate against the CA bundle loaded once per client.
         """
         sock = socket.create_connection((self.host, self.port), self.timeout)
 
@@ -262,17 +707,7 @@ class VerifiedHTTPSConnection(httplib.HTTPSConnection):
             self.sock = sock
             self._tunnel()
 
-        if self.insecure is True:
-            kwargs = {'cert_reqs': ssl.CERT_NONE}
-        else:
-            kwargs = {'cert_reqs': ssl.CERT_REQUIRED, 'ca_certs': self.ca_file}
-
-        if self.cert_file:
-            kwargs['certfile'] = self.cert_file
-            if self.key_file:
-                kwargs['keyfile'] = self.key_file
-
-        self.sock = ssl.wrap_socket(sock, **kwargs)
+        self.sock = self.tls_context.wrap_socket(sock, self.host)
 
     @staticmethod
     def get_system_ca_file():
@@ -305,3 +740,23 @@ class ResponseBodyIterator(object):
             return chunk
         else:
             raise StopIteration()
+
+
+class ResponseBodyReader(object):
+    """A file-like object reading from an iterator over body chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,32 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Loading and dumping of YAML, using libyaml when it is available.
+"""
+
+import yaml
+
+# The libyaml based classes are only defined when PyYAML was built with
+# libyaml, the pure Python ones parse and emit the same documents.
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+yaml_dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def yaml_load(stream):
+    """Parse a YAML document, like yaml.safe_load."""
+    return yaml.load(stream, Loader=yaml_loader)
+
+
+def yaml_dump(data, stream=None, **kwargs):
+    """Serialize data as YAML, like yaml.safe_dump."""
+    return yaml.dump(data, stream, Dumper=yaml_dumper, **kwargs)
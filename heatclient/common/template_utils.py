@@ -0,0 +1,254 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Fetching of the files referenced by templates and environments.
+"""
+
+import hashlib
+import json
+
+import six
+from six.moves.urllib import error as urllib_error
+from six.moves.urllib import request as urllib_request
+import yaml
+
+from heatclient.common import cache
+from heatclient.common import concurrency
+from heatclient.common import template_format
+from heatclient import exc
+from heatclient.openstack.common.py3kcompat import urlutils
+
+# Maximum number of files fetched at once
+MAX_FETCH_WORKERS = 8
+
+# Bounds of the ContentCache: one week, and this many URLs
+CONTENT_CACHE_MAX_AGE = 7 * 24 * 3600
+CONTENT_CACHE_MAX_ENTRIES = 512
+
+# Resource types ending with these name a nested template
+TEMPLATE_EXTENSIONS = ('.yaml', '.yml', '.template', '.json')
+
+
+def read_url(str_url):
+    return urlutils.urlopen(str_url).read()
+
+
+class ContentCache(object):
+    """A persistent cache of the template files fetched over HTTP(S).
+
+    A cached URL is revalidated with a conditional request on the ETag or
+    Last-Modified header it was served with, and its contents are only
+    downloaded again when they have changed. Other URLs, such as file:
+    URLs, are always read since reading them costs no more than reading
+    the cache.
+
+    :param directory: directory of the cache files
+    :param max_age: number of seconds after which an entry is dropped
+    :param max_entries: maximum number of URLs kept in the cache
+    """
+
+    def __init__(self, directory, max_age=CONTENT_CACHE_MAX_AGE,
+                 max_entries=CONTENT_CACHE_MAX_ENTRIES):
+        self._entries = cache.DiskCache(directory, ttl=max_age,
+                                        max_entries=max_entries)
+
+    def read(self, str_url):
+        if urlutils.urlparse(str_url).scheme not in ('http', 'https'):
+            return read_url(str_url)
+
+        record = self._entries.get(str_url)
+        content = None
+        if record is not None:
+            content = self._entries.get_bytes(str_url)
+            if (content is None or
+                    record.get('digest') != _digest(content)):
+                record = None
+        headers = record['validator'] if record is not None else {}
+        try:
+            resp = urlutils.urlopen(urllib_request.Request(str_url,
+                                                           headers=headers))
+        except urllib_error.HTTPError as e:
+            if e.code == 304 and record is not None:
+                return content
+            raise
+        content = resp.read()
+        info = resp.info()
+        validator = {}
+        if info.get('etag'):
+            validator['If-None-Match'] = info.get('etag')
+        if info.get('last-modified'):
+            validator['If-Modified-Since'] = info.get('last-modified')
+        if validator:
+            self._entries.set_bytes(str_url, content)
+            self._entries.set(str_url, {'validator': validator,
+                                        'digest': _digest(content)})
+        else:
+            self._entries.pop(str_url)
+        return content
+
+
+def _digest(content):
+    if isinstance(content, six.text_type):
+        content = content.encode('utf-8')
+    return hashlib.sha1(content).hexdigest()
+
+
+def fetch_urls(urls, max_workers=MAX_FETCH_WORKERS, content_cache=None):
+    """Read urls concurrently.
+
+    Returns the contents in the order of urls, with the URLError raised
+    in place of the contents of each URL which could not be read.
+
+    :param content_cache: optional :class:`ContentCache` to read through
+    """
+    if not urls:
+        return []
+    read = content_cache.read if content_cache is not None else read_url
+    pool = concurrency.ThreadPool(min(len(urls), max_workers))
+    try:
+        results = []
+        for future in pool.map(read, urls):
+            try:
+                results.append(future.result())
+            except urlutils.URLError as e:
+                results.append(e)
+        return results
+    finally:
+        pool.shutdown()
+
+
+def parse_template(content):
+    """Parse a JSON or YAML template.
+
+    Returns None if content is not a template, e.g. a script read with
+    get_file.
+    """
+    if isinstance(content, dict):
+        return content
+    try:
+        if content.startswith('{'):
+            template = json.loads(content)
+        else:
+            template = template_format.yaml_load(content)
+    except (ValueError, yaml.YAMLError):
+        return None
+    if isinstance(template, dict):
+        return template
+
+
+def is_template_url(resource_type):
+    return (isinstance(resource_type, six.string_types) and
+            '::' not in resource_type and
+            (resource_type.endswith(TEMPLATE_EXTENSIONS) or
+             '://' in resource_type))
+
+
+def template_references(template):
+    """Return the files and nested templates referenced by a template.
+
+    :returns: tuple of the list of get_file paths and the list of the
+              resource types which name a nested template, as written
+              in the template
+    """
+    files = []
+    _find_get_files(template, files)
+    nested = []
+    resources = template.get('resources') or template.get('Resources')
+    if isinstance(resources, dict):
+        for name in sorted(resources):
+            resource = resources[name]
+            if isinstance(resource, dict):
+                resource_type = resource.get('type') or resource.get('Type')
+                if is_template_url(resource_type):
+                    nested.append(resource_type)
+    return files, nested
+
+
+def _find_get_files(node, found):
+    if isinstance(node, dict):
+        path = node.get('get_file')
+        if isinstance(path, six.string_types):
+            found.append(path)
+        for key in sorted(node):
+            _find_get_files(node[key], found)
+    elif isinstance(node, list):
+        for item in node:
+            _find_get_files(item, found)
+
+
+def get_nested_files(roots, files, max_workers=MAX_FETCH_WORKERS,
+                     content_cache=None):
+    """Fetch the files templates reference, down to any nesting depth.
+
+    Starting from the roots, the get_file paths and nested templates of
+    each template are resolved against the URL of the template. The
+    templates are walked breadth first, and the URLs of each level are
+    fetched concurrently. Every URL is fetched once, so references back
+    to an earlier template do not loop. Identical contents found under
+    different URLs are held as a single string.
+
+    :param roots: list of (url, content) tuples of the templates to start
+                  from
+    :param files: dict of file contents keyed by the path as written in
+                  the referencing template, updated in place
+    :param content_cache: optional :class:`ContentCache` to read through
+    :raises: :class:`heatclient.exc.CommandError` if a file can not be
+             fetched, or if a path refers to different contents
+    """
+    interned = {}
+
+    def intern(content):
+        return interned.setdefault(_digest(content), content)
+
+    contents = {}
+    level = []
+    for url, content in roots:
+        if not isinstance(content, six.string_types):
+            content = json.dumps(content)
+        contents[url] = intern(content)
+        level.append((url, contents[url]))
+
+    while level:
+        references = []
+        for url, content in level:
+            template = parse_template(content)
+            if template is None:
+                continue
+            get_files, nested = template_references(template)
+            for path in get_files:
+                references.append((path, urlutils.urljoin(url, path), False))
+            for path in nested:
+                references.append((path, urlutils.urljoin(url, path), True))
+
+        new_urls = []
+        for path, str_url, is_template in references:
+            if str_url not in contents and str_url not in new_urls:
+                new_urls.append(str_url)
+        results = fetch_urls(new_urls, max_workers, content_cache)
+        failed = [str_url for str_url, result in zip(new_urls, results)
+                  if isinstance(result, urlutils.URLError)]
+        if failed:
+            raise exc.CommandError('Could not fetch %s' % ', '.join(failed))
+        for str_url, result in zip(new_urls, results):
+            contents[str_url] = intern(result)
+
+        # Only the nested templates fetched for the first time are walked
+        unwalked = set(new_urls)
+        level = []
+        for path, str_url, is_template in references:
+            content = contents[str_url]
+            if files.setdefault(path, content) != content:
+                raise exc.CommandError('%s refers to different files' % path)
+            if is_template and str_url in unwalked:
+                unwalked.remove(str_url)
+                level.append((str_url, content))
@@ -20,14 +20,14 @@ import prettytable
 import sys
 import textwrap
 import uuid
-import yaml
 
+from heatclient.common import template_format
 from heatclient import exc
 from heatclient.openstack.common import importutils
 
 supported_formats = {
     "json": lambda x: json.dumps(x, indent=2),
-    "yaml": yaml.safe_dump
+    "yaml": template_format.yaml_dump
 }
 
 
@@ -41,6 +41,14 @@ class CommunicationError(BaseException):
     """Unable to communicate with server."""
 
 
+class Timeout(BaseException):
+    """Timed out waiting for the operation to complete."""
+
+
+class LazyLoadForbidden(BaseException, AttributeError):
+    """The attribute is not loaded and lazy loading is forbidden."""
+
+
 class HTTPException(BaseException):
     """Base exception for all HTTP-derived exceptions."""
     code = 'N/A'
@@ -189,6 +189,31 @@ class HeatShell(object):
                             action='store_true',
                             help='Send os-username and os-password to heat')
 
+        parser.add_argument('--resource-type-cache-ttl',
+                            default=utils.env('HEAT_RESOURCE_TYPE_CACHE_TTL',
+                                              default=0),
+                            type=int, metavar='<SECONDS>',
+                            help='Cache the resource types of the endpoint '
+                            'on disk for this many seconds. Defaults to '
+                            'env[HEAT_RESOURCE_TYPE_CACHE_TTL] or 0, which '
+                            'disables the cache.')
+
+        parser.add_argument('--cache-dir',
+                            default=utils.env('HEAT_CACHE_DIR') or None,
+                            metavar='<DIRECTORY>',
+                            help='Directory of the on-disk caches. Defaults '
+                            'to env[HEAT_CACHE_DIR] or '
+                            '$XDG_CACHE_HOME/heatclient.')
+
+        parser.add_argument('--template-cache',
+                            default=strutils.bool_from_string(
+                                utils.env('HEAT_TEMPLATE_CACHE')),
+                            action='store_true',
+                            help='Cache the files templates and environments '
+                            'reference by HTTP(S) URLs on disk, and download '
+                            'them again only when they have changed. '
+                            'Defaults to env[HEAT_TEMPLATE_CACHE].')
+
         return parser
 
     def get_subcommand_parser(self, version):
@@ -370,6 +395,8 @@ class HeatShell(object):
             if not endpoint:
                 endpoint = self._get_endpoint(_ksclient, **kwargs)
 
+        kwargs['resource_type_cache_ttl'] = args.resource_type_cache_ttl
+        kwargs['cache_dir'] = args.cache_dir
         client = heat_client.Client(api_version, endpoint, **kwargs)
 
         args.func(client, args)
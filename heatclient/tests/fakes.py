@@ -50,8 +50,9 @@ def script_heat_list():
                             'success, you',
                             {'content-type': 'application/json'},
                             json.dumps(resp_dict))
-    v1client.Client.json_request('GET',
-                                 '/stacks?').AndReturn((resp, resp_dict))
+    v1client.Client.json_stream_request(
+        'GET', '/stacks?', 'stacks').AndReturn(
+            (resp, iter(resp_dict['stacks'])))
 
 
 def script_heat_normal_error():
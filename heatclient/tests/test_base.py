@@ -0,0 +1,217 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+import testtools
+
+from heatclient.common import base
+from heatclient.common import concurrency
+from heatclient import exc
+
+
+class ManagerTest(testtools.TestCase):
+
+    def test_list_iter(self):
+        api = mock.MagicMock()
+        api.json_stream_request.return_value = (
+            {}, iter([{'id': '1'}, {}, {'id': '2'}]))
+        manager = base.Manager(api)
+        manager.resource_class = base.Resource
+
+        results = manager._list_iter('/things', 'things')
+        self.assertFalse(api.json_stream_request.called)
+        results = list(results)
+        api.json_stream_request.assert_called_once_with(
+            'GET', '/things', 'things')
+        self.assertEqual(['1', '2'], [r.id for r in results])
+        self.assertTrue(results[0].is_loaded())
+
+    def _fetch_pages(self, total):
+        calls = []
+
+        def fetch_page(params):
+            calls.append(dict(params))
+            start = int(params.get('marker', 0))
+            stop = min(start + params['limit'], total)
+            return [mock.Mock(id=str(i + 1)) for i in range(start, stop)]
+        return fetch_page, calls
+
+    def test_paginate(self):
+        fetch_page, calls = self._fetch_pages(5)
+        manager = base.Manager(None)
+        results = list(manager._paginate(fetch_page, {'limit': 2}))
+        self.assertEqual(['1', '2', '3', '4', '5'], [r.id for r in results])
+        self.assertEqual([{'limit': 2},
+                          {'limit': 2, 'marker': '2'},
+                          {'limit': 2, 'marker': '4'}], calls)
+
+    def test_paginate_limit(self):
+        fetch_page, calls = self._fetch_pages(10)
+        manager = base.Manager(None)
+        results = list(manager._paginate(fetch_page, {'limit': 2}, limit=3))
+        self.assertEqual(['1', '2', '3'], [r.id for r in results])
+        self.assertEqual(2, len(calls))
+
+    def test_paginate_no_page_size(self):
+        calls = []
+
+        def fetch_page(params):
+            calls.append(params)
+            return [mock.Mock(id='1'), mock.Mock(id='2')]
+        manager = base.Manager(None)
+        results = list(manager._paginate(fetch_page, {}))
+        self.assertEqual(2, len(results))
+        self.assertEqual([{}], calls)
+
+    def test_paginate_many_pages(self):
+        # Each page is fetched in the same frame, so the number of pages
+        # is not bounded by the recursion limit.
+        fetch_page, calls = self._fetch_pages(5000)
+        manager = base.Manager(None)
+        results = manager._paginate(fetch_page, {'limit': 1})
+        self.assertEqual(5000, sum(1 for r in results))
+        self.assertEqual(5001, len(calls))
+
+    def test_list_compact(self):
+        api = mock.MagicMock()
+        api.json_request.return_value = ({}, {'things': [
+            {'id': '1', 'name': 'one'}, {'id': '2', 'name': 'two'}]})
+        manager = base.Manager(api)
+        manager.resource_class = base.Resource
+        manager.compact_resources = True
+
+        first, second = manager._list('/things', 'things')
+        self.assertIsInstance(first._info, base.Record)
+        self.assertIs(first._info._index, second._info._index)
+        self.assertEqual('two', second.name)
+        self.assertNotIn('name', second.__dict__)
+        self.assertEqual({'id': '2', 'name': 'two'}, second.to_dict())
+        self.assertEqual("<Resource id=2, name=two>", repr(second))
+
+
+class ResourceTest(testtools.TestCase):
+
+    def test_fields_materialized_on_access(self):
+        r = base.Resource(None, {'id': '1', 'name': 'one'}, loaded=True)
+        self.assertNotIn('name', r.__dict__)
+        self.assertEqual('one', r.name)
+        self.assertEqual('one', r.__dict__['name'])
+        self.assertNotIn('id', r.__dict__)
+        self.assertRaises(AttributeError, getattr, r, 'other')
+
+    def test_repr(self):
+        r = base.Resource(None, {'id': '1', 'name': 'one'}, loaded=True)
+        self.assertEqual("<Resource id=1, name=one>", repr(r))
+
+    def test_eq(self):
+        r1 = base.Resource(None, {'id': '1', 'name': 'one'})
+        r2 = base.Resource(None, {'id': '1', 'name': 'uno'})
+        self.assertEqual(r1, r2)
+
+    def test_lazy_load(self):
+        manager = mock.MagicMock()
+        manager.get.return_value = base.Resource(
+            None, {'id': '1', 'name': 'one', 'size': 2})
+        r = base.Resource(manager, {'id': '1', 'name': 'one'})
+        self.assertEqual(2, r.size)
+        manager.get.assert_called_once_with('1')
+        self.assertTrue(r.is_loaded())
+
+    def _lazy_manager(self, policy):
+        manager = base.Manager(mock.MagicMock())
+        manager.resource_class = base.Resource
+        manager.lazy_load = policy
+        manager.lazy_load_counter = base.LazyLoadCounter()
+        manager.get = mock.MagicMock(return_value=base.Resource(
+            None, {'id': '1', 'size': 2}))
+        return manager
+
+    def test_lazy_load_counted(self):
+        manager = self._lazy_manager(base.LAZY_LOAD_ALLOW)
+        r = base.Resource(manager, {'id': '1'})
+        self.assertEqual(2, r.size)
+        self.assertEqual({'Resource': 1}, manager.lazy_load_counter.counts)
+        self.assertEqual(1, manager.lazy_load_counter.total)
+
+    def test_lazy_load_warn(self):
+        manager = self._lazy_manager(base.LAZY_LOAD_WARN)
+        self.patch(base, 'LOG', mock.MagicMock())
+        r = base.Resource(manager, {'id': '1'})
+        self.assertEqual(2, r.size)
+        base.LOG.warning.assert_called_once_with(
+            'Loading %s to get attribute %s', 'Resource', 'size')
+        self.assertEqual(1, manager.lazy_load_counter.total)
+
+    def test_lazy_load_forbid(self):
+        manager = self._lazy_manager(base.LAZY_LOAD_FORBID)
+        r = base.Resource(manager, {'id': '1'})
+        self.assertRaises(exc.LazyLoadForbidden, getattr, r, 'size')
+        self.assertRaises(AttributeError, getattr, r, 'size')
+        self.assertFalse(manager.get.called)
+        self.assertEqual('1', r.id)
+        self.assertEqual(0, manager.lazy_load_counter.total)
+
+    def test_load_all(self):
+        manager = self._lazy_manager(base.LAZY_LOAD_FORBID)
+        manager.api.thread_pool = concurrency.ThreadPool()
+        self.addCleanup(manager.api.thread_pool.shutdown)
+        loaded = base.Resource(manager, {'id': '0'}, loaded=True)
+        resources = [base.Resource(manager, {'id': '1'}), loaded]
+        results = manager.load_all(resources)
+        self.assertEqual(resources, results)
+        self.assertEqual(2, results[0].size)
+        manager.get.assert_called_once_with('1')
+
+    def test_to_dict(self):
+        info = {'id': '1', 'outputs': [{'key': 'value'}]}
+        r = base.Resource(None, info, loaded=True)
+        d = r.to_dict()
+        self.assertEqual(info, d)
+        self.assertIsNot(info['outputs'], d['outputs'])
+
+    def test_to_dict_no_copy(self):
+        info = {'id': '1', 'outputs': [{'key': 'value'}]}
+        r = base.Resource(None, info, loaded=True)
+        d = r.to_dict(copy=False)
+        self.assertEqual(info, d)
+        self.assertIs(info['outputs'], d['outputs'])
+
+        def set_id():
+            d['id'] = '2'
+        self.assertRaises(TypeError, set_id)
+        self.assertEqual(['id', 'outputs'], sorted(d.keys()))
+
+    def test_to_dict_not_a_dict(self):
+        r = base.Resource(None, 'OS::Heat::None', loaded=True)
+        self.assertEqual('OS::Heat::None', r.to_dict(copy=False))
+
+
+class RecordTest(testtools.TestCase):
+
+    def setUp(self):
+        super(RecordTest, self).setUp()
+        self.record = base.Record({'id': 0, 'name': 1}, ('1', 'one'))
+
+    def test_mapping(self):
+        self.assertEqual('one', self.record['name'])
+        self.assertIn('id', self.record)
+        self.assertNotIn('other', self.record)
+        self.assertRaises(KeyError, lambda: self.record['other'])
+        self.assertEqual(2, len(self.record))
+        self.assertEqual({'id': '1', 'name': 'one'}, dict(self.record))
+        self.assertEqual({'id': '1', 'name': 'one'}, self.record)
+        self.assertIsInstance(self.record, base.collections_abc.Mapping)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.record, '__dict__'))
+        self.assertFalse(hasattr(base.DictView({}), '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.record, 'name', 'x')
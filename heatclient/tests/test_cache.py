@@ -0,0 +1,150 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import time
+
+import fixtures
+import testtools
+
+from heatclient.common import cache
+
+
+class LRUCacheTest(testtools.TestCase):
+
+    def test_get_set(self):
+        lru = cache.LRUCache()
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual('default', lru.get('a', 'default'))
+        lru.set('a', 1)
+        self.assertEqual(1, lru.get('a'))
+        self.assertEqual(1, lru.hits)
+        self.assertEqual(2, lru.misses)
+
+    def test_evicts_least_recently_used(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(2, len(lru))
+        self.assertEqual(1, lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(3, lru.get('c'))
+
+    def test_repeated_use(self):
+        lru = cache.LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        for i in range(100):
+            lru.get('a')
+        lru.set('b', 2)
+        lru.set('c', 3)
+        self.assertEqual(2, len(lru))
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(2, lru.get('b'))
+        self.assertTrue(len(lru._uses) <= 2 * 2 + 16)
+
+    def test_ttl(self):
+        lru = cache.LRUCache(ttl=10)
+        lru.set('a', 1)
+        now = time.time()
+        self.patch(time, 'time', lambda: now + 11)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(0, len(lru))
+
+    def test_pop_clear(self):
+        lru = cache.LRUCache()
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(1, lru.pop('a'))
+        self.assertIsNone(lru.pop('a'))
+        lru.clear()
+        self.assertEqual(0, len(lru))
+
+    def test_pop_matching(self):
+        lru = cache.LRUCache()
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.pop_matching(lambda key, value: value > 1)
+        self.assertEqual(1, lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+
+
+class DiskCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(DiskCacheTest, self).setUp()
+        self.directory = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'cache')
+
+    def test_get_set(self):
+        disk = cache.DiskCache(self.directory)
+        self.assertIsNone(disk.get('/a'))
+        self.assertEqual('default', disk.get('/a', 'default'))
+        disk.set('/a', {'b': [1, 2]})
+        self.assertEqual({'b': [1, 2]}, disk.get('/a'))
+        # Entries are shared with other cache objects on the directory
+        self.assertEqual({'b': [1, 2]},
+                         cache.DiskCache(self.directory).get('/a'))
+        self.assertEqual(1, len(os.listdir(self.directory)))
+
+    def test_ttl(self):
+        disk = cache.DiskCache(self.directory, ttl=10)
+        disk.set('/a', 1)
+        now = time.time()
+        self.patch(time, 'time', lambda: now + 11)
+        self.assertIsNone(disk.get('/a'))
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_pop_clear(self):
+        disk = cache.DiskCache(self.directory)
+        disk.pop('/a')
+        disk.clear()
+        disk.set('/a', 1)
+        disk.set('/b', 2)
+        disk.pop('/a')
+        self.assertIsNone(disk.get('/a'))
+        disk.clear()
+        self.assertIsNone(disk.get('/b'))
+
+    def test_bytes(self):
+        disk = cache.DiskCache(self.directory)
+        disk.set('/a', {'b': 1})
+        disk.set_bytes('/a', b'\x89\xff')
+        self.assertEqual(b'\x89\xff', disk.get_bytes('/a'))
+        self.assertEqual({'b': 1}, disk.get('/a'))
+        disk.pop('/a')
+        self.assertIsNone(disk.get_bytes('/a'))
+        self.assertEqual([], os.listdir(self.directory))
+
+    def test_corrupt_entry(self):
+        disk = cache.DiskCache(self.directory)
+        disk.set('/a', 1)
+        with open(disk._path('/a'), 'w') as f:
+            f.write('{')
+        self.assertIsNone(disk.get('/a'))
+
+    def test_unwritable(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path, 'file')
+        open(path, 'w').close()
+        disk = cache.DiskCache(os.path.join(path, 'cache'))
+        disk.set('/a', 1)
+        self.assertIsNone(disk.get('/a'))
+
+    def test_user_cache_dir(self):
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME',
+                                                     '/tmp/xdg'))
+        self.assertEqual('/tmp/xdg/heatclient', cache.user_cache_dir())
+        self.useFixture(fixtures.EnvironmentVariable('XDG_CACHE_HOME'))
+        self.assertEqual(os.path.expanduser('~/.cache/heatclient'),
+                         cache.user_cache_dir())
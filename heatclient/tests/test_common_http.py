@@ -11,6 +11,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import decimal
+import errno
+import json
+import logging
+import mock
+import socket
+import time
+
 import testtools
 
 from heatclient.common import http
@@ -406,3 +414,591 @@ class HttpClientTest(testtools.TestCase):
     def test_fake_json_request(self):
         self.assertRaises(exc.InvalidEndpoint, http.HTTPClient,
                           'fake://example.com:8004')
+
+    def _keepalive_response(self):
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}')
+        resp.will_close = False
+        return resp
+
+    def _idle_socket(self):
+        sock, peer = socket.socketpair()
+        self.addCleanup(sock.close)
+        self.addCleanup(peer.close)
+        return sock
+
+    def test_http_keepalive_connection_reused(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004')
+        resp, body = client.json_request('GET', '')
+        self.assertEqual(1, len(client.connection_pool))
+        resp, body = client.json_request('GET', '')
+        self.assertEqual(200, resp.status)
+        self.assertEqual({}, body)
+        self.m.VerifyAll()
+
+    def test_http_stale_keepalive_connection_retried(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndRaise(
+            http.httplib.BadStatusLine(''))
+        mock_conn.close()
+        # The request is retried once on a new connection
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}'))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004')
+        client.json_request('GET', '')
+        resp, body = client.json_request('GET', '')
+        self.assertEqual(200, resp.status)
+        self.assertEqual(0, len(client.connection_pool))
+        self.m.VerifyAll()
+
+    def test_http_keepalive_connection_timeout_not_retried(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndRaise(socket.timeout('timed out'))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004')
+        client.json_request('GET', '')
+        self.assertRaises(exc.CommunicationError,
+                          client.json_request, 'GET', '')
+        self.m.VerifyAll()
+
+    def test_http_stale_keepalive_connection_post_not_retried(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        mock_conn.request('POST', '/', headers=headers)
+        mock_conn.getresponse().AndRaise(
+            http.httplib.BadStatusLine(''))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004')
+        client.json_request('GET', '')
+        self.assertRaises(exc.CommunicationError,
+                          client.json_request, 'POST', '')
+        self.m.VerifyAll()
+
+    def test_http_stale_keepalive_connection_post_unsent_retried(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(self._keepalive_response())
+        mock_conn.request('POST', '/', headers=headers).AndRaise(
+            socket.error(errno.EPIPE, 'Broken pipe'))
+        mock_conn.close()
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('POST', '/', headers=headers)
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(
+                201, 'Created', {'content-type': 'application/json'}, '{}'))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004')
+        client.json_request('GET', '')
+        resp, body = client.json_request('POST', '')
+        self.assertEqual(201, resp.status)
+        self.m.VerifyAll()
+
+    def test_http_connection_pool_disabled(self):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        for i in range(2):
+            mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                    timeout=600.0)
+            mock_conn.request('GET', '/', headers=headers)
+            mock_conn.getresponse().AndReturn(self._keepalive_response())
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004', pool_size=0)
+        self.assertIsNone(client.connection_pool)
+        client.json_request('GET', '')
+        client.json_request('GET', '')
+        self.m.VerifyAll()
+
+    def _record_stream_request(self, body, headers=None):
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        mock_conn.request('GET', '/v1/stacks',
+                          headers={'Content-Type': 'application/json',
+                                   'Accept': 'application/json',
+                                   'User-Agent': 'python-heatclient'})
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', headers or {'content-type': 'application/json'},
+            body)
+        resp.will_close = False
+        mock_conn.getresponse().AndReturn(resp)
+
+    def _test_http_json_stream_request(self):
+        self._record_stream_request(
+            '{"stacks": [{"id": "1"}, {"id": "2", "n": 1.5}]}')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        resp, items = client.json_stream_request('GET', '/stacks', 'stacks')
+        self.assertEqual(200, resp.status)
+        self.assertEqual([{'id': '1'}, {'id': '2', 'n': 1.5}], list(items))
+        # The connection is released once the body has been consumed
+        self.assertEqual(1, len(client.connection_pool))
+        self.m.VerifyAll()
+
+    def test_http_json_stream_request(self):
+        self.patch(http, 'ijson', None)
+        self._test_http_json_stream_request()
+
+    @testtools.skipIf(http.ijson is None, 'ijson is not installed')
+    def test_http_json_stream_request_ijson(self):
+        self._test_http_json_stream_request()
+
+    def test_http_json_stream_request_ijson_stub(self):
+        self.patch(http, 'ijson', FakeIjson())
+        self._test_http_json_stream_request()
+
+    def test_http_json_stream_request_repeated(self):
+        self.patch(http, 'ijson', FakeIjson())
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient'}
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.sock = self._idle_socket()
+        for i in range(10):
+            mock_conn.request('GET', '/v1/stacks', headers=headers)
+            resp = fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'},
+                '{"stacks": [{"id": "%d", "n": 0.5}]}' % i)
+            resp.will_close = False
+            mock_conn.getresponse().AndReturn(resp)
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        for i in range(10):
+            resp, items = client.json_stream_request('GET', '/stacks',
+                                                     'stacks')
+            self.assertEqual([{'id': str(i), 'n': 0.5}], list(items))
+        self.assertEqual(10, http.ijson.calls)
+        self.m.VerifyAll()
+
+    def test_http_json_stream_request_non_json_resp_cont_type(self):
+        self._record_stream_request('{}', {'content-type': 'not/json'})
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        resp, items = client.json_stream_request('GET', '/stacks', 'stacks')
+        self.assertEqual([], list(items))
+        self.assertEqual(1, len(client.connection_pool))
+        self.m.VerifyAll()
+
+    def test_request_headers_not_modified(self):
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/',
+                          headers={'Content-Type': 'application/json',
+                                   'Accept': 'application/json',
+                                   'X-Auth-Token': 'abcd1234',
+                                   'User-Agent': 'python-heatclient'})
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}'))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004', token='abcd1234')
+        headers = {'Content-Type': 'application/json'}
+        client.json_request('GET', '', headers=headers)
+        self.assertEqual({'Content-Type': 'application/json',
+                          'Accept': 'application/json'}, headers)
+        self.m.VerifyAll()
+
+    def test_base_headers_cached(self):
+        client = http.HTTPClient('http://example.com:8004', token='abcd1234',
+                                 username='user', password='pass')
+        defaults, creds = client._base_headers()
+        self.assertEqual({'User-Agent': 'python-heatclient',
+                          'X-Auth-Token': 'abcd1234'}, defaults)
+        self.assertIsNone(creds)
+        self.assertIs(defaults, client._base_headers()[0])
+
+        client.auth_token = 'efgh5678'
+        defaults, creds = client._base_headers()
+        self.assertEqual('efgh5678', defaults['X-Auth-Token'])
+
+        client.auth_token = None
+        defaults, creds = client._base_headers()
+        self.assertEqual({'User-Agent': 'python-heatclient'}, defaults)
+        self.assertEqual({'X-Auth-User': 'user', 'X-Auth-Key': 'pass'},
+                         creds)
+
+    def _record_redirect(self, status, url, location):
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/v1' + url,
+                          headers={'Content-Type': 'application/json',
+                                   'Accept': 'application/json',
+                                   'User-Agent': 'python-heatclient'})
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(
+                status, 'Moved',
+                {'location': 'http://example.com:8004/v1%s' % location},
+                ''))
+
+    def _record_ok(self, url):
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/v1' + url,
+                          headers={'Content-Type': 'application/json',
+                                   'Accept': 'application/json',
+                                   'User-Agent': 'python-heatclient'})
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(
+                200, 'OK', {'content-type': 'application/json'}, '{}'))
+
+    def test_http_json_request_permanent_redirect_cached(self):
+        self._record_redirect(301, '/a', '/b')
+        self._record_redirect(301, '/b', '/c')
+        self._record_ok('/c')
+        # The second request goes straight to the final location
+        self._record_ok('/c')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        client.json_request('GET', '/a')
+        self.assertEqual(0, client.redirect_cache.hits)
+        resp, body = client.json_request('GET', '/a')
+        self.assertEqual(200, resp.status)
+        self.assertEqual({}, body)
+        self.assertEqual(1, client.redirect_cache.hits)
+        self.m.VerifyAll()
+
+    def test_http_json_request_temporary_redirect_not_cached(self):
+        self._record_redirect(301, '/a', '/b')
+        self._record_redirect(302, '/b', '/c')
+        self._record_ok('/c')
+        self._record_redirect(302, '/b', '/c')
+        self._record_ok('/c')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        client.json_request('GET', '/a')
+        client.json_request('GET', '/a')
+        self.assertEqual(1, client.redirect_cache.hits)
+        self.assertEqual('/b', client.redirect_cache.get('/a'))
+        self.m.VerifyAll()
+
+    def test_http_json_request_too_many_redirects(self):
+        for i in range(http.MAX_REDIRECTS + 1):
+            self._record_redirect(302, '/a', '/a')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1')
+        self.assertRaises(exc.InvalidEndpoint,
+                          client.json_request, 'GET', '/a')
+        self.m.VerifyAll()
+
+    def _record_get(self, status, extra_headers, resp_headers, body):
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': 'python-heatclient',
+                   'X-Auth-Token': 'abcd'}
+        headers.update(extra_headers)
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/v1/stacks/a', headers=headers)
+        mock_conn.getresponse().AndReturn(
+            fakes.FakeHTTPResponse(status, 'OK', resp_headers, body))
+
+    def test_http_json_request_response_cache(self):
+        self._record_get(200, {}, {'content-type': 'application/json',
+                                   'etag': '"v1"'}, '{"a": 1}')
+        self._record_get(304, {'If-None-Match': '"v1"'}, {}, '')
+        self._record_get(304, {'If-None-Match': '"v1"'}, {}, '')
+        self._record_get(200, {'If-None-Match': '"v1"'},
+                         {'content-type': 'application/json',
+                          'etag': '"v2"'}, '{"a": 2}')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1',
+                                 token='abcd', response_cache_size=4)
+        cache = client.response_cache
+        self.assertEqual({'a': 1}, client.json_request('GET', '/stacks/a')[1])
+        resp, body = client.json_request('GET', '/stacks/a')
+        self.assertEqual(200, resp.status)
+        self.assertEqual({'a': 1}, body)
+        self.assertEqual({'a': 1}, client.json_request('GET', '/stacks/a')[1])
+        self.assertEqual({'a': 2}, client.json_request('GET', '/stacks/a')[1])
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(16, cache.bytes_saved)
+        self.m.VerifyAll()
+
+    def test_http_json_request_response_cache_no_validator(self):
+        for i in range(2):
+            self._record_get(200, {}, {'content-type': 'application/json'},
+                             '{}')
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1',
+                                 token='abcd', response_cache_size=4)
+        client.json_request('GET', '/stacks/a')
+        client.json_request('GET', '/stacks/a')
+        self.assertEqual(0, len(client.response_cache))
+        self.m.VerifyAll()
+
+    def test_http_json_request_response_cache_scope(self):
+        self._record_get(200, {}, {'content-type': 'application/json',
+                                   'etag': '"v1"'}, '{}')
+        mock_conn = http.httplib.HTTPConnection('example.com', 8004,
+                                                timeout=600.0)
+        mock_conn.request('GET', '/v1/stacks/a',
+                          headers={'Content-Type': 'application/json',
+                                   'Accept': 'application/json',
+                                   'User-Agent': 'python-heatclient',
+                                   'X-Auth-Token': 'efgh'})
+        mock_conn.getresponse().AndReturn(fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '{}'))
+        # Replay, create client, assert
+        self.m.ReplayAll()
+        client = http.HTTPClient('http://example.com:8004/v1',
+                                 token='abcd', response_cache_size=4)
+        client.json_request('GET', '/stacks/a')
+        # A request made with another token is not conditional
+        client.auth_token = 'efgh'
+        client.json_request('GET', '/stacks/a')
+        self.m.VerifyAll()
+
+
+class FakeIjson(object):
+    """Stands in for ijson 2.x, which decodes fractions as Decimal."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def items(self, fileobj, prefix):
+        self.calls += 1
+        # Read in small pieces, as ijson does, to exercise the reader
+        body = ''.join(iter(lambda: fileobj.read(4), ''))
+        doc = json.loads(body, parse_float=decimal.Decimal)
+        for key in prefix.split('.')[:-1]:
+            doc = doc[key]
+        return iter(doc)
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.sock, self.peer = socket.socketpair()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+        self.peer.close()
+
+
+class ConnectionPoolTest(testtools.TestCase):
+
+    def _connection(self):
+        conn = FakeConnection()
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_get_empty(self):
+        pool = http.ConnectionPool()
+        self.assertIsNone(pool.get('key'))
+
+    def test_put_get(self):
+        pool = http.ConnectionPool()
+        conn = self._connection()
+        pool.put('key', conn)
+        self.assertIsNone(pool.get('other'))
+        self.assertIs(conn, pool.get('key'))
+        self.assertIsNone(pool.get('key'))
+
+    def test_maxsize(self):
+        pool = http.ConnectionPool(maxsize=1)
+        conn1 = self._connection()
+        conn2 = self._connection()
+        pool.put('key', conn1)
+        pool.put('key', conn2)
+        self.assertEqual(1, len(pool))
+        self.assertTrue(conn2.closed)
+        self.assertIs(conn1, pool.get('key'))
+
+    def test_idle_timeout(self):
+        pool = http.ConnectionPool(idle_timeout=10)
+        conn = self._connection()
+        pool.put('key', conn)
+        now = time.time()
+        self.patch(time, 'time', lambda: now + 11)
+        self.assertIsNone(pool.get('key'))
+        self.assertTrue(conn.closed)
+
+    def test_dropped_by_server(self):
+        pool = http.ConnectionPool()
+        conn = self._connection()
+        pool.put('key', conn)
+        conn.peer.close()
+        self.assertIsNone(pool.get('key'))
+        self.assertTrue(conn.closed)
+
+    def test_clear(self):
+        pool = http.ConnectionPool()
+        conn = self._connection()
+        pool.put('key', conn)
+        pool.clear()
+        self.assertEqual(0, len(pool))
+        self.assertTrue(conn.closed)
+
+
+class TLSContextTest(testtools.TestCase):
+
+    def setUp(self):
+        super(TLSContextTest, self).setUp()
+        patcher = mock.patch.object(http.ssl, 'SSLContext')
+        self.ssl_context = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_context_created_once(self):
+        tls = http.TLSContext(ca_file='ca.pem', cert_file='cert.pem',
+                              key_file='key.pem')
+        self.assertIs(tls.context, tls.context)
+        self.assertEqual(1, self.ssl_context.call_count)
+        context = self.ssl_context.return_value
+        context.load_verify_locations.assert_called_once_with('ca.pem')
+        context.load_cert_chain.assert_called_once_with('cert.pem',
+                                                        'key.pem')
+        self.assertEqual(http.ssl.CERT_REQUIRED, context.verify_mode)
+
+    def test_context_insecure(self):
+        tls = http.TLSContext(ca_file='ca.pem', insecure=True)
+        context = tls.context
+        self.assertEqual(http.ssl.CERT_NONE, context.verify_mode)
+        self.assertFalse(context.load_verify_locations.called)
+        self.assertFalse(context.load_cert_chain.called)
+
+    def test_wrap_socket_shares_context(self):
+        self.patch(http.ssl, 'HAS_SNI', True)
+        tls = http.TLSContext(ca_file='ca.pem')
+        context = self.ssl_context.return_value
+
+        tls.wrap_socket('sock-1', 'example.com')
+        tls.wrap_socket('sock-2', 'example.com')
+
+        self.assertEqual([
+            (('sock-1',), {'server_hostname': 'example.com'}),
+            (('sock-2',), {'server_hostname': 'example.com'}),
+        ], context.wrap_socket.call_args_list)
+        self.assertEqual(1, self.ssl_context.call_count)
+
+    def test_connection_params_share_context(self):
+        client = http.HTTPClient('https://example.com:8004',
+                                 ca_file='ca.pem')
+        conn1 = client.get_connection()
+        conn2 = client.get_connection()
+        self.assertIsInstance(conn1, http.VerifiedHTTPSConnection)
+        self.assertIs(conn1.tls_context, conn2.tls_context)
+        self.assertEqual('ca.pem', conn1.tls_context.ca_file)
+
+
+class ResponseBodyReaderTest(testtools.TestCase):
+
+    def test_read(self):
+        reader = http.ResponseBodyReader(['abc', 'de', 'f'])
+        self.assertEqual('ab', reader.read(2))
+        self.assertEqual('cde', reader.read(3))
+        self.assertEqual('f', reader.read(3))
+        self.assertEqual('', reader.read(3))
+
+    def test_read_all(self):
+        reader = http.ResponseBodyReader(['abc', 'de'])
+        self.assertEqual('a', reader.read(1))
+        self.assertEqual('bcde', reader.read())
+
+
+class HttpClientLoggingTest(testtools.TestCase):
+
+    def setUp(self):
+        super(HttpClientLoggingTest, self).setUp()
+        self.addCleanup(http.LOG.setLevel, http.LOG.level)
+        self.debug = self.patch_debug()
+        self.resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, '')
+        self.resp.version = 11
+
+    def patch_debug(self):
+        patcher = mock.patch.object(http.LOG, 'debug')
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_debug_disabled(self):
+        http.LOG.setLevel(logging.INFO)
+        client = http.HTTPClient('http://example.com:8004')
+        client.log_curl_request('GET', '/', {'headers': {}, 'body': 'x'})
+        client.log_http_response(self.resp, 'x')
+        self.assertFalse(self.debug.called)
+
+    def test_debug_enabled(self):
+        http.LOG.setLevel(logging.DEBUG)
+        client = http.HTTPClient('http://example.com:8004')
+        client.log_curl_request('GET', '/', {'headers': {}, 'body': 'x'})
+        self.debug.assert_called_once_with(
+            "curl -i -X GET -d 'x' http://example.com:8004/")
+
+    def test_debug_body_limit(self):
+        http.LOG.setLevel(logging.DEBUG)
+        client = http.HTTPClient('http://example.com:8004',
+                                 log_body_limit=4)
+        client.log_curl_request('GET', '/', {'headers': {},
+                                             'body': 'abcdefgh'})
+        self.debug.assert_called_once_with(
+            "curl -i -X GET -d 'abcd... (4 bytes truncated)' "
+            "http://example.com:8004/")
+
+        self.debug.reset_mock()
+        client.log_http_response(self.resp, 'abcdefgh', 4)
+        self.debug.assert_called_once_with(
+            '\nHTTP/1.1 200 OK\ncontent-type: application/json\n\n'
+            'abcd... (4 bytes truncated)\n')
@@ -0,0 +1,191 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+import mock
+import testtools
+
+from heatclient.common import concurrency
+from heatclient import exc
+from heatclient.v1 import client as v1client
+
+
+class ThreadPoolTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ThreadPoolTest, self).setUp()
+        self.pool = concurrency.ThreadPool(max_workers=4)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_submit(self):
+        future = self.pool.submit(lambda x, y=0: x + y, 1, y=2)
+        self.assertEqual(3, future.result(5))
+        self.assertTrue(future.done())
+        self.assertIsNone(future.exception())
+
+    def test_submit_exception(self):
+        def not_found():
+            raise exc.HTTPNotFound()
+
+        future = self.pool.submit(not_found)
+        self.assertRaises(exc.HTTPNotFound, future.result, 5)
+        self.assertIsInstance(future.exception(), exc.HTTPNotFound)
+
+    def test_map_keeps_order(self):
+        futures = self.pool.map(lambda x: x * 2, range(20))
+        self.assertEqual([x * 2 for x in range(20)],
+                         [f.result(5) for f in futures])
+
+    def test_calls_in_flight(self):
+        # All the calls have to be running at once to pass the barrier
+        started = []
+        release = threading.Event()
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                started.append(True)
+                if len(started) == 4:
+                    release.set()
+            release.wait(5)
+            return release.is_set()
+
+        futures = [self.pool.submit(call) for i in range(4)]
+        self.assertEqual([True] * 4, [f.result(5) for f in futures])
+        self.assertEqual(4, len(self.pool._workers))
+
+    def test_max_workers(self):
+        futures = [self.pool.submit(lambda: None) for i in range(20)]
+        [f.result(5) for f in futures]
+        self.assertTrue(len(self.pool._workers) <= 4)
+
+    def test_submit_from_worker(self):
+        pool = concurrency.ThreadPool(max_workers=1)
+        self.addCleanup(pool.shutdown)
+
+        def fan_out():
+            return [f.result(5) for f in pool.map(lambda x: x * 2, [1, 2])]
+        self.assertEqual([2, 4], pool.submit(fan_out).result(5))
+        self.assertEqual(1, len(pool._workers))
+
+    def test_no_workers(self):
+        pool = concurrency.ThreadPool(max_workers=0)
+        future = pool.submit(threading.current_thread)
+        self.assertTrue(future.done())
+        self.assertIs(threading.current_thread(), future.result())
+        self.assertEqual([], pool._workers)
+
+
+class FutureProxyTest(testtools.TestCase):
+
+    def test_client_close(self):
+        client = v1client.Client('http://example.com:8004')
+        pool = client.http_client.thread_pool
+        self.assertEqual('done', pool.submit(lambda: 'done').result(5))
+        client.close()
+        self.assertEqual([], pool._workers)
+
+    def test_client_futures(self):
+        client = v1client.Client('http://example.com:8004')
+        self.addCleanup(client.close)
+        client.stacks.get = mock.Mock(return_value='the_stack')
+
+        future = client.futures.stacks.get('the_stack/abcd1234')
+        self.assertEqual('the_stack', future.result(5))
+        client.stacks.get.assert_called_once_with('the_stack/abcd1234')
+
+    def test_client_futures_exception(self):
+        client = v1client.Client('http://example.com:8004')
+        self.addCleanup(client.close)
+        client.stacks.get = mock.Mock(side_effect=exc.HTTPNotFound())
+
+        future = client.futures.stacks.get('bad')
+        self.assertRaises(exc.HTTPNotFound, future.result, 5)
+
+    def test_client_futures_list(self):
+        client = v1client.Client('http://example.com:8004')
+        self.addCleanup(client.close)
+        threads = []
+
+        def list_stacks():
+            threads.append(threading.current_thread())
+            yield 'a'
+            yield 'b'
+        client.stacks.list = list_stacks
+
+        future = client.futures.stacks.list()
+        self.assertEqual(['a', 'b'], future.result(5))
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    def test_client_futures_fan_out(self):
+        client = v1client.Client('http://example.com:8004', max_workers=1)
+        self.addCleanup(client.close)
+
+        def json_request(method, url):
+            stack_name = url.split('/')[-1]
+            return {}, {'stack': {'id': stack_name + '-id',
+                                  'stack_name': stack_name}}
+        self.patch(client.http_client, 'json_request', json_request)
+
+        future = client.futures.stacks.get_many(['a', 'b'])
+        self.assertEqual(['a/a-id', 'b/b-id'],
+                         [s.identifier for s in future.result(5)])
+
+
+class ReadAheadTest(testtools.TestCase):
+
+    def test_read_ahead(self):
+        self.assertEqual(list(range(10)),
+                         list(concurrency.read_ahead(iter(range(10)), 2)))
+
+    def test_runs_ahead(self):
+        produced = []
+        ahead = threading.Event()
+
+        def items():
+            for i in range(5):
+                produced.append(i)
+                if len(produced) == 3:
+                    ahead.set()
+                yield i
+
+        results = concurrency.read_ahead(items(), 2)
+        self.assertEqual(0, next(results))
+        # The consumer holds item 0 while items 1 and 2 are produced
+        self.assertTrue(ahead.wait(5))
+        self.assertEqual([1, 2, 3, 4], list(results))
+
+    def test_exception(self):
+        def items():
+            yield 1
+            raise exc.HTTPNotFound()
+
+        results = concurrency.read_ahead(items(), 2)
+        self.assertEqual(1, next(results))
+        self.assertRaises(exc.HTTPNotFound, next, results)
+
+    def test_close_stops_producer(self):
+        finished = threading.Event()
+
+        def items():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                finished.set()
+
+        results = concurrency.read_ahead(items(), 1)
+        self.assertEqual(0, next(results))
+        results.close()
+        self.assertTrue(finished.wait(5))
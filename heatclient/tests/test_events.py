@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from heatclient.common import concurrency
+from heatclient import exc
+from heatclient.v1 import events
 from heatclient.v1.events import Event
 from heatclient.v1.events import EventManager
 
@@ -37,12 +40,12 @@ class EventManagerTest(testtools.TestCase):
         self.m.StubOutWithMock(manager, '_resolve_stack_id')
         manager._resolve_stack_id(stack_id).AndReturn('teststack/abcd1234')
         self.m.ReplayAll()
-        manager._list = MagicMock()
-        manager.list(stack_id, resource_name)
+        manager._list_iter = MagicMock()
+        list(manager.list(stack_id, resource_name))
         # Make sure url is correct.
-        manager._list.assert_called_once_with('/stacks/teststack%2Fabcd1234/'
-                                              'resources/testresource/events',
-                                              "events")
+        manager._list_iter.assert_called_once_with(
+            '/stacks/teststack%2Fabcd1234/resources/testresource/events',
+            "events")
 
     def test_list_event_with_unicode_resource_name(self):
         stack_id = 'teststack',
@@ -51,21 +54,21 @@ class EventManagerTest(testtools.TestCase):
         self.m.StubOutWithMock(manager, '_resolve_stack_id')
         manager._resolve_stack_id(stack_id).AndReturn('teststack/abcd1234')
         self.m.ReplayAll()
-        manager._list = MagicMock()
-        manager.list(stack_id, resource_name)
+        manager._list_iter = MagicMock()
+        list(manager.list(stack_id, resource_name))
         # Make sure url is correct.
-        manager._list.assert_called_once_with('/stacks/teststack%2Fabcd1234/'
-                                              'resources/%E5%B7%A5%E4%BD%9C/'
-                                              'events', "events")
+        manager._list_iter.assert_called_once_with(
+            '/stacks/teststack%2Fabcd1234/resources/%E5%B7%A5%E4%BD%9C/'
+            'events', "events")
 
     def test_list_event_with_none_resource_name(self):
         stack_id = 'teststack',
         manager = EventManager(None)
-        manager._list = MagicMock()
-        manager.list(stack_id)
+        manager._list_iter = MagicMock()
+        list(manager.list(stack_id))
         # Make sure url is correct.
-        manager._list.assert_called_once_with('/stacks/teststack/'
-                                              'events', "events")
+        manager._list_iter.assert_called_once_with('/stacks/teststack/'
+                                                   'events', "events")
 
     def test_get_event(self):
         fields = {'stack_id': 'teststack',
@@ -83,8 +86,7 @@ class EventManagerTest(testtools.TestCase):
                 return {}, {'event': []}
 
         manager = EventManager(FakeAPI())
-        Event.__init__ = MagicMock()
-        Event.__init__.return_value = None
+        self.patch(Event, '__init__', MagicMock(return_value=None))
         self.m.StubOutWithMock(manager, '_resolve_stack_id')
         manager._resolve_stack_id('teststack').AndReturn('teststack/abcd1234')
         self.m.ReplayAll()
@@ -106,9 +108,133 @@ class EventManagerTest(testtools.TestCase):
                 return {}, {'event': []}
 
         manager = EventManager(FakeAPI())
-        Event.__init__ = MagicMock()
-        Event.__init__.return_value = None
+        self.patch(Event, '__init__', MagicMock(return_value=None))
         self.m.StubOutWithMock(manager, '_resolve_stack_id')
         manager._resolve_stack_id('teststack').AndReturn('teststack/abcd1234')
         self.m.ReplayAll()
         manager.get(**fields)
+
+    def test_list_many(self):
+        class FakeAPI(object):
+            thread_pool = concurrency.ThreadPool()
+
+        manager = EventManager(FakeAPI())
+        self.addCleanup(manager.api.thread_pool.shutdown)
+
+        def list_events(stack_id):
+            if stack_id == 'bad':
+                raise exc.HTTPNotFound()
+            return [stack_id]
+        manager.list = list_events
+
+        results = manager.list_many(['stack1', 'bad', 'stack2'])
+        self.assertEqual(['stack1'], results[0])
+        self.assertIsInstance(results[1], exc.HTTPNotFound)
+        self.assertEqual(['stack2'], results[2])
+
+    def _paginated_manager(self, total):
+        class FakeEvent(object):
+            def __init__(self, id):
+                self.id = id
+
+        pages = []
+
+        def mock_list(url, response_key):
+            pages.append(url)
+            params = dict(p.split('=') for p in url.split('?')[1].split('&'))
+            start = int(params.get('marker', 0))
+            end = min(start + int(params['limit']), total)
+            return [FakeEvent(str(i)) for i in range(start + 1, end + 1)]
+
+        manager = EventManager(None)
+        manager._list_iter = MagicMock(side_effect=mock_list)
+        return manager, pages
+
+    def test_list_event_paginated(self):
+        manager, pages = self._paginated_manager(total=25)
+        evts = manager.list('teststack', page_size=10)
+        self.assertEqual([], pages)
+        self.assertEqual([str(i) for i in range(1, 26)],
+                         [e.id for e in evts])
+        self.assertEqual(['/stacks/teststack/events?limit=10',
+                          '/stacks/teststack/events?limit=10&marker=10',
+                          '/stacks/teststack/events?limit=10&marker=20'],
+                         pages)
+
+    def test_list_event_paginated_limit(self):
+        manager, pages = self._paginated_manager(total=25)
+        evts = list(manager.list('teststack', page_size=10, limit=15,
+                                 marker='5'))
+        self.assertEqual([str(i) for i in range(6, 21)],
+                         [e.id for e in evts])
+        self.assertEqual(2, len(pages))
+
+    def test_list_event_streamed(self):
+        api = MagicMock()
+        api.json_stream_request.return_value = (
+            {}, iter([{'id': '1'}, {'id': '2'}]))
+        manager = EventManager(api)
+        results = list(manager.list('teststack/abcd1234', sort_dir='asc'))
+        self.assertEqual(2, len(results))
+        api.json_stream_request.assert_called_once_with(
+            'GET', '/stacks/teststack/abcd1234/events?sort_dir=asc',
+            'events')
+        self.assertFalse(api.json_request.called)
+
+    def test_list_event_filters(self):
+        manager = EventManager(None)
+        manager._list_iter = MagicMock(return_value=[])
+        list(manager.list('teststack', resource_status='FAILED',
+                          resource_action='CREATE', sort_dir='asc'))
+        manager._list_iter.assert_called_once_with(
+            '/stacks/teststack/events?resource_action=CREATE&'
+            'resource_status=FAILED&sort_dir=asc', "events")
+
+    def _watch_manager(self, pages, statuses):
+        class FakeEvent(object):
+            def __init__(self, id):
+                self.id = id
+
+        api = MagicMock()
+        api.json_request.side_effect = [
+            ({}, {'stack': {'stack_status': status}}) for status in statuses]
+        manager = EventManager(api)
+        manager.list = MagicMock(side_effect=[
+            [FakeEvent(id) for id in page] for page in pages])
+        sleeps = []
+        self.patch(events.time, 'sleep', sleeps.append)
+        return manager, sleeps
+
+    def test_watch(self):
+        manager, sleeps = self._watch_manager(
+            pages=[['1', '2'], [], [], ['3'], [], ['4']],
+            statuses=['CREATE_IN_PROGRESS', 'CREATE_IN_PROGRESS',
+                      'CREATE_COMPLETE'])
+        results = [e.id for e in manager.watch('teststack')]
+        self.assertEqual(['1', '2', '3', '4'], results)
+        # Back off while idle, reset once new events arrive
+        self.assertEqual([1, 2, 4, 1], sleeps)
+        markers = [c[1]['marker'] for c in manager.list.call_args_list]
+        self.assertEqual([None, '2', '2', '2', '3', '3'], markers)
+        self.assertEqual(3, manager.api.json_request.call_count)
+
+    def test_watch_max_poll_interval(self):
+        manager, sleeps = self._watch_manager(
+            pages=[[]] * 5,
+            statuses=['CREATE_IN_PROGRESS'] * 4 + ['CREATE_FAILED'])
+        list(manager.watch('teststack', max_poll_interval=5))
+        self.assertEqual([2, 4, 5, 5], sleeps)
+
+    def test_watch_marker_ignored(self):
+        manager, sleeps = self._watch_manager(
+            pages=[['1', '2'], ['1', '2'], ['1', '2', '3'],
+                   ['1', '2', '3'], ['1', '2', '3']],
+            statuses=['CREATE_IN_PROGRESS', 'CREATE_COMPLETE'])
+        results = [e.id for e in manager.watch('teststack')]
+        self.assertEqual(['1', '2', '3'], results)
+        self.assertEqual(5, manager.list.call_count)
+
+    def test_watch_stack_deleted(self):
+        manager, sleeps = self._watch_manager(pages=[], statuses=[])
+        manager.list.side_effect = [[MagicMock(id='1')], exc.HTTPNotFound()]
+        self.assertEqual(1, len(list(manager.watch('teststack'))))
@@ -11,9 +11,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import fixtures
 import mock
 import testtools
 
+from heatclient.common import cache
 from heatclient.v1.resource_types import ResourceTypeManager
 
 
@@ -43,3 +45,30 @@ class ResourceTypeManagerTest(testtools.TestCase):
         manager.get(resource_type)
         expect = ('GET', '/resource_types/OS%3A%3ANova%3A%3AKeyPair')
         self.assertIn(expect, test_api.requests)
+
+    def test_disk_cache(self):
+        api = mock.MagicMock()
+        api.json_request.side_effect = [
+            ({}, {'resource_types': ['OS::Nova::Server']}),
+            ({}, {'attributes': {}, 'properties': {}}),
+            ({}, {'resource_types': ['OS::Nova::Server', 'OS::Heat::None']}),
+        ]
+        disk_cache = cache.DiskCache(self.useFixture(fixtures.TempDir()).path)
+        manager = ResourceTypeManager(api, disk_cache)
+        for i in range(2):
+            types = manager.list()
+            self.assertEqual(['OS::Nova::Server'],
+                             [t.resource_type for t in types])
+            self.assertEqual({'attributes': {}, 'properties': {}},
+                             manager.get('OS::Nova::Server'))
+        self.assertEqual(2, api.json_request.call_count)
+
+        # A new manager on the same directory uses the cached types
+        manager = ResourceTypeManager(api, cache.DiskCache(
+            disk_cache.directory))
+        self.assertEqual(1, len(manager.list()))
+        self.assertEqual(2, api.json_request.call_count)
+
+        manager.invalidate_cache()
+        self.assertEqual(2, len(manager.list()))
+        self.assertEqual(3, api.json_request.call_count)
@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from heatclient.common import cache
+from heatclient.common import concurrency
+from heatclient import exc
 from heatclient.v1.resources import Resource
 from heatclient.v1.resources import ResourceManager
 
@@ -73,3 +76,42 @@ class ResourceManagerTest(testtools.TestCase):
         manager._resolve_stack_id('teststack').AndReturn('teststack/abcd1234')
         self.m.ReplayAll()
         manager.get(**fields)
+
+    def test_get_many(self):
+        class FakeAPI(object):
+            thread_pool = concurrency.ThreadPool()
+
+        manager = ResourceManager(FakeAPI())
+        self.addCleanup(manager.api.thread_pool.shutdown)
+
+        def get(stack_id, resource_name):
+            assert stack_id == 'teststack/abcd1234'
+            if resource_name == 'bad':
+                raise exc.HTTPNotFound()
+            return resource_name.upper()
+        manager.get = get
+        self.m.StubOutWithMock(manager, '_resolve_stack_id')
+        manager._resolve_stack_id('teststack').AndReturn('teststack/abcd1234')
+        self.m.ReplayAll()
+
+        results = manager.get_many('teststack', ['a', 'bad', 'c'])
+        self.assertEqual('A', results[0])
+        self.assertIsInstance(results[1], exc.HTTPNotFound)
+        self.assertEqual('C', results[2])
+        self.m.VerifyAll()
+
+    def test_get_not_found_forgets_stack_id(self):
+        class FakeAPI(object):
+            """Fake API for a stack whose resource is not found."""
+
+            def json_request(self, method, url):
+                if url == '/stacks/teststack':
+                    return {}, {'stack': {'id': 'abcd1234',
+                                          'stack_name': 'teststack'}}
+                raise exc.HTTPNotFound()
+
+        identifier_cache = cache.LRUCache()
+        manager = ResourceManager(FakeAPI(), identifier_cache)
+        self.assertRaises(exc.HTTPNotFound, manager.get,
+                          'teststack', 'testresource')
+        self.assertEqual(0, len(identifier_cache))
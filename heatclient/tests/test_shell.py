@@ -19,6 +19,7 @@ import sys
 import yaml
 
 import fixtures
+import mock
 import tempfile
 import testscenarios
 import testtools
@@ -32,11 +33,15 @@ except ImportError:
     import simplejson as json
 from keystoneclient.v2_0 import client as ksclient
 
+from heatclient.common import http
+from heatclient.common import template_utils
 from heatclient import exc
 import heatclient.shell
 from heatclient.tests import fakes
 from heatclient.v1 import client as v1client
+from heatclient.v1 import events as v1events
 from heatclient.v1 import shell as v1shell
+from heatclient.v1 import stacks as v1stacks
 
 
 load_tests = testscenarios.load_tests_apply_scenarios
@@ -194,11 +199,12 @@ class ShellValidationTest(TestCase):
 
     def test_failed_auth(self):
         self.m.StubOutWithMock(ksclient, 'Client')
-        self.m.StubOutWithMock(v1client.Client, 'json_request')
+        self.m.StubOutWithMock(v1client.Client, 'json_stream_request')
         fakes.script_keystone_client()
         failed_msg = 'Unable to authenticate user with credentials provided'
-        v1client.Client.json_request(
-            'GET', '/stacks?').AndRaise(exc.Unauthorized(failed_msg))
+        v1client.Client.json_stream_request(
+            'GET', '/stacks?', 'stacks').AndRaise(
+                exc.Unauthorized(failed_msg))
 
         self.m.ReplayAll()
         fake_env = {
@@ -238,6 +244,7 @@ class ShellBase(TestCase):
         self.m = mox.Mox()
         self.m.StubOutWithMock(ksclient, 'Client')
         self.m.StubOutWithMock(v1client.Client, 'json_request')
+        self.m.StubOutWithMock(v1client.Client, 'json_stream_request')
         self.m.StubOutWithMock(v1client.Client, 'raw_request')
         self.addCleanup(self.m.VerifyAll)
         self.addCleanup(self.m.UnsetStubs)
@@ -746,6 +753,252 @@ class ShellTestStandaloneToken(ShellTestUserPass):
         pass
 
 
+class ShellStandaloneBase(ShellBase):
+
+    # Run commands in standalone mode, scripting the requests of the
+    # HTTPClient which the managers of the client use
+    def setUp(self):
+        super(ShellStandaloneBase, self).setUp()
+        self.m.StubOutWithMock(http.HTTPClient, 'json_request')
+        self.m.StubOutWithMock(http.HTTPClient, 'json_stream_request')
+        self.set_fake_env({
+            'OS_AUTH_TOKEN': 'a_token',
+            'OS_NO_CLIENT_AUTH': 'True',
+            'HEAT_URL': 'http://no.where',
+            'OS_USERNAME': 'username',
+            'OS_PASSWORD': 'password'
+        })
+        self.patch(v1stacks.time, 'sleep', lambda seconds: None)
+        self.patch(v1events.time, 'sleep', lambda seconds: None)
+
+    def _event(self, event_id, status, resource_name='WebServer'):
+        return {'id': event_id,
+                'event_time': '2013-12-05T14:14:3%s' % event_id,
+                'resource_name': resource_name,
+                'resource_status': status,
+                'resource_status_reason': 'state changed'}
+
+    def _stack(self, status, updated_time=None):
+        return {'id': '2', 'stack_name': 'teststack',
+                'stack_status': status,
+                'stack_status_reason': 'Stack %s' % status,
+                'creation_time': '2013-12-05T14:14:30Z',
+                'updated_time': updated_time}
+
+    def _script_events(self, url, events):
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, None)
+        http.HTTPClient.json_stream_request(
+            'GET', url, 'events').AndReturn((resp, iter(events)))
+
+    def _script_stack(self, url, stack):
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, None)
+        if url.startswith('/stacks?'):
+            body = {'stacks': [stack]}
+        else:
+            body = {'stack': stack}
+        http.HTTPClient.json_request('GET', url).AndReturn((resp, body))
+
+
+class ShellTestEvents(ShellStandaloneBase):
+
+    def test_event_list_follow(self):
+        url = '/stacks/teststack/2/events'
+        self._script_events(url + '?sort_dir=asc', [
+            self._event('1', 'CREATE_IN_PROGRESS'),
+            self._event('2', 'CREATE_COMPLETE')])
+        self._script_events(url + '?marker=2&sort_dir=asc', [])
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('CREATE_IN_PROGRESS'))
+        self._script_events(url + '?marker=2&sort_dir=asc', [
+            self._event('3', 'CREATE_IN_PROGRESS', 'IP')])
+        self._script_events(url + '?marker=3&sort_dir=asc', [])
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('CREATE_COMPLETE'))
+        # Polled once more after the stack finished
+        self._script_events(url + '?marker=3&sort_dir=asc', [])
+        self.m.ReplayAll()
+
+        event_text = self.shell('event-list teststack/2 --follow')
+        self.assertEqual([
+            '2013-12-05T14:14:31 WebServer CREATE_IN_PROGRESS state changed',
+            '2013-12-05T14:14:32 WebServer CREATE_COMPLETE state changed',
+            '2013-12-05T14:14:33 IP CREATE_IN_PROGRESS state changed',
+        ], event_text.splitlines())
+
+    def test_event_list_follow_not_found(self):
+        resp = fakes.FakeHTTPResponse(
+            404, 'Not Found', {'content-type': 'application/json'}, '{}')
+        http.HTTPClient.json_stream_request(
+            'GET', '/stacks/missing/events?sort_dir=asc', 'events'
+        ).AndRaise(exc.from_response(resp, '{}'))
+        self.m.ReplayAll()
+
+        self.shell_error('event-list missing --follow',
+                         'Stack not found: missing')
+
+
+class ShellTestWait(ShellStandaloneBase):
+
+    def _script_stack_list(self):
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, None)
+        http.HTTPClient.json_stream_request(
+            'GET', '/stacks?', 'stacks').AndReturn(
+                (resp, iter([self._stack('CREATE_COMPLETE')])))
+
+    def _script_create(self):
+        resp = fakes.FakeHTTPResponse(
+            201, 'Created', {'content-type': 'application/json'}, None)
+        http.HTTPClient.json_request(
+            'POST', '/stacks', body=mox.IgnoreArg(),
+            headers={'X-Auth-Key': 'password', 'X-Auth-User': 'username'}
+        ).AndReturn((resp, {'stack': {'id': '2'}}))
+
+    def _create_command(self):
+        template_file = os.path.join(TEST_VAR_DIR, 'minimal.template')
+        return 'stack-create teststack --wait --template-file=%s' % (
+            template_file)
+
+    def test_stack_create_wait(self):
+        url = '/stacks/teststack/2/events'
+        self._script_create()
+        self._script_events(url + '?sort_dir=asc', [
+            self._event('1', 'CREATE_IN_PROGRESS')])
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('CREATE_IN_PROGRESS'))
+        self._script_events(url + '?marker=1&sort_dir=asc', [
+            self._event('2', 'CREATE_COMPLETE')])
+        self._script_stack('/stacks?id=2', self._stack('CREATE_COMPLETE'))
+        self._script_stack_list()
+        self.m.ReplayAll()
+
+        create_text = self.shell(self._create_command())
+        lines = create_text.splitlines()
+        self.assertEqual([
+            '2013-12-05T14:14:31 WebServer CREATE_IN_PROGRESS state changed',
+            '2013-12-05T14:14:32 WebServer CREATE_COMPLETE state changed',
+        ], lines[:2])
+        self.assertRegexpMatches(create_text, 'teststack')
+
+    def test_stack_create_wait_failed(self):
+        self._script_create()
+        self._script_events('/stacks/teststack/2/events?sort_dir=asc', [])
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('CREATE_FAILED'))
+        self.m.ReplayAll()
+
+        self.shell_error(self._create_command(),
+                         'Stack teststack/2 CREATE_FAILED: '
+                         'Stack CREATE_FAILED')
+
+    def test_stack_update_wait(self):
+        url = '/stacks/teststack/2/events'
+        # The stack still shows the outcome of an earlier update
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('UPDATE_COMPLETE', 't1'))
+        self._script_events(url + '?limit=1&sort_dir=desc', [
+            self._event('5', 'UPDATE_COMPLETE')])
+        resp = fakes.FakeHTTPResponse(
+            202, 'Accepted', {}, 'The request is accepted for processing.')
+        http.HTTPClient.json_request(
+            'PUT', '/stacks/teststack/2', body=mox.IgnoreArg(),
+            headers={'X-Auth-Key': 'password', 'X-Auth-User': 'username'}
+        ).AndReturn((resp, None))
+
+        self._script_events(url + '?marker=5&sort_dir=asc', [])
+        self._script_stack('/stacks/teststack/2',
+                           self._stack('UPDATE_COMPLETE', 't1'))
+        self._script_events(url + '?marker=5&sort_dir=asc', [
+            self._event('6', 'UPDATE_IN_PROGRESS')])
+        self._script_stack('/stacks?id=2',
+                           self._stack('UPDATE_IN_PROGRESS', 't2'))
+        self._script_events(url + '?marker=6&sort_dir=asc', [
+            self._event('7', 'UPDATE_COMPLETE')])
+        self._script_stack('/stacks?id=2',
+                           self._stack('UPDATE_COMPLETE', 't2'))
+        self._script_stack_list()
+        self.m.ReplayAll()
+
+        template_file = os.path.join(TEST_VAR_DIR, 'minimal.template')
+        update_text = self.shell(
+            'stack-update teststack/2 --wait --template-file=%s' %
+            template_file)
+        lines = update_text.splitlines()
+        self.assertEqual([
+            '2013-12-05T14:14:36 WebServer UPDATE_IN_PROGRESS state changed',
+            '2013-12-05T14:14:37 WebServer UPDATE_COMPLETE state changed',
+        ], lines[:2])
+
+
+class ShellTestResourceTypes(ShellStandaloneBase):
+
+    def setUp(self):
+        super(ShellTestResourceTypes, self).setUp()
+        self.cache_dir = self.useFixture(fixtures.TempDir()).path
+        self.useFixture(fixtures.EnvironmentVariable(
+            'HEAT_CACHE_DIR', self.cache_dir))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'HEAT_RESOURCE_TYPE_CACHE_TTL', '60'))
+
+    def _script_get(self, url, body):
+        resp = fakes.FakeHTTPResponse(
+            200, 'OK', {'content-type': 'application/json'}, None)
+        http.HTTPClient.json_request('GET', url).AndReturn((resp, body))
+
+    def test_resource_type_list_refresh(self):
+        body = {'resource_types': ['AWS::EC2::Instance', 'OS::Nova::Server']}
+        # Requested by the first and the refreshed listing only
+        self._script_get('/resource_types', body)
+        self._script_get('/resource_types', body)
+        self.m.ReplayAll()
+
+        for command in ('resource-type-list', 'resource-type-list',
+                        'resource-type-list --refresh'):
+            list_text = self.shell(command)
+            self.assertRegexpMatches(list_text, 'OS::Nova::Server')
+            self.assertRegexpMatches(list_text, 'AWS::EC2::Instance')
+        self.assertTrue(os.path.isdir(
+            os.path.join(self.cache_dir, 'resource_types')))
+
+    def test_resource_type_show_refresh(self):
+        body = {'resource_type': 'OS::Nova::Server',
+                'properties': {'flavor': {'type': 'string'}}}
+        self._script_get('/resource_types/OS%3A%3ANova%3A%3AServer', body)
+        self._script_get('/resource_types/OS%3A%3ANova%3A%3AServer', body)
+        self.m.ReplayAll()
+
+        for command in ('resource-type-show OS::Nova::Server',
+                        'resource-type-show OS::Nova::Server',
+                        'resource-type-show --refresh OS::Nova::Server'):
+            show_text = self.shell(command)
+            self.assertEqual(body, json.loads(show_text))
+
+
+class ShellCacheOptionsTest(TestCase):
+
+    def _parse_args(self, **env):
+        for key, value in env.items():
+            self.useFixture(fixtures.EnvironmentVariable(key, value))
+        return heatclient.shell.HeatShell().get_base_parser().parse_args([])
+
+    def test_template_cache_env(self):
+        self.assertFalse(
+            self._parse_args(HEAT_TEMPLATE_CACHE='false').template_cache)
+        self.assertFalse(
+            self._parse_args(HEAT_TEMPLATE_CACHE='0').template_cache)
+        self.assertTrue(
+            self._parse_args(HEAT_TEMPLATE_CACHE='true').template_cache)
+
+    def test_content_cache_dir(self):
+        args = self._parse_args(HEAT_TEMPLATE_CACHE='1',
+                                HEAT_CACHE_DIR='/tmp/heat-cache')
+        content_cache = v1shell._content_cache(args)
+        self.assertEqual('/tmp/heat-cache/files',
+                         content_cache._entries.directory)
+
+
 class ShellEnvironmentTest(TestCase):
 
     def setUp(self):
@@ -847,6 +1100,76 @@ class ShellEnvironmentTest(TestCase):
         env_base_url = 'file:///tmp/foo'
         self.collect_links(env, a, url, env_base_url)
 
+    def test_shared_files_fetched_once(self):
+        env = '''
+        resource_registry:
+          "OS::Thingy": "file:///home/b/a.yaml"
+          resources:
+            freddy:
+              "OS::Thingy": "file:///home/b/a.yaml"
+            fred:
+              "OS::Thingy": "file:///home/b/b.yaml"
+        '''
+        fetched = []
+
+        def read_url(url):
+            fetched.append(url)
+            return url[-6:]
+        self.patch(template_utils, 'read_url', read_url)
+        fields = {'files': {}}
+        v1shell._resolve_environment_urls(fields, '', yaml.safe_load(env))
+        self.assertEqual(['file:///home/b/a.yaml', 'file:///home/b/b.yaml'],
+                         sorted(fetched))
+        self.assertEqual({'file:///home/b/a.yaml': 'a.yaml',
+                          'file:///home/b/b.yaml': 'b.yaml'},
+                         fields['files'])
+
+    def test_fetch_errors_reported_per_url(self):
+        env = '''
+        resource_registry:
+          "OS::Thingy": "file:///home/b/a.yaml"
+          "OS::Other": "file:///home/b/b.yaml"
+          "OS::Third": "file:///home/b/c.yaml"
+        '''
+
+        def read_url(url):
+            if url.endswith('c.yaml'):
+                return 'c'
+            raise urlutils.URLError('not found')
+        self.patch(template_utils, 'read_url', read_url)
+        fields = {'files': {}}
+        e = self.assertRaises(exc.CommandError,
+                              v1shell._resolve_environment_urls,
+                              fields, '', yaml.safe_load(env))
+        self.assertIn('file:///home/b/a.yaml', str(e))
+        self.assertIn('file:///home/b/b.yaml', str(e))
+        self.assertNotIn('c.yaml', str(e))
+
+    def test_process_template_nested_files(self):
+        tmpdir = self.useFixture(fixtures.TempDir()).path
+        with open(os.path.join(tmpdir, 'main.yaml'), 'w') as f:
+            f.write('resources: {a: {type: nested.yaml}}')
+        with open(os.path.join(tmpdir, 'nested.yaml'), 'w') as f:
+            f.write('resources: {a: {properties: {s: {get_file: a.sh}}}}')
+        with open(os.path.join(tmpdir, 'a.sh'), 'w') as f:
+            f.write('#!/bin/sh')
+        args = mock.Mock(template_file=os.path.join(tmpdir, 'main.yaml'),
+                         environment_file=None, template_cache=False)
+        fields = {}
+        v1shell._set_template_fields(None, args, fields)
+        v1shell._process_environment_and_files(args, fields)
+        self.assertEqual({
+            'nested.yaml': 'resources: {a: {properties: {s: {get_file: '
+                           'a.sh}}}}',
+            'a.sh': '#!/bin/sh'}, fields['files'])
+
+    def test_process_template_no_files(self):
+        args = mock.Mock(template_file=None, environment_file=None,
+                         template_cache=False)
+        fields = {'template_url': 'http://no.where/t.yaml'}
+        v1shell._process_environment_and_files(args, fields)
+        self.assertNotIn('files', fields)
+
     def test_unsupported_protocol(self):
         env = '''
         resource_registry:
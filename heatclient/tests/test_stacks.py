@@ -12,10 +12,18 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+from heatclient.common import base
+from heatclient.common import cache
+from heatclient.common import concurrency
+from heatclient import exc
+from heatclient.v1 import events
+from heatclient.v1 import stacks
 from heatclient.v1.stacks import Stack
+from heatclient.v1.stacks import StackChildManager
 from heatclient.v1.stacks import StackManager
 
 from mock import MagicMock
+from six.moves.urllib import parse as urlparse
 import testscenarios
 from testscenarios.scenarios import multiply_scenarios
 import testtools
@@ -96,6 +104,368 @@ class StackOperationsTest(testtools.TestCase):
         manager.create.assert_called_once_with('the_stack/abcd1234')
 
 
+class StackManagerGetManyTest(testtools.TestCase):
+
+    def test_get_many(self):
+        api = MagicMock()
+        api.thread_pool = concurrency.ThreadPool()
+        self.addCleanup(api.thread_pool.shutdown)
+
+        def json_request(method, url):
+            if url == '/stacks/bad':
+                raise exc.HTTPNotFound()
+            stack_name = url.split('/')[-1]
+            return {}, {'stack': {'id': stack_name + '-id',
+                                  'stack_name': stack_name}}
+        api.json_request.side_effect = json_request
+        manager = StackManager(api)
+
+        results = manager.get_many(['stack_1', 'bad', 'stack_2'])
+        self.assertEqual('stack_1/stack_1-id', results[0].identifier)
+        self.assertIsInstance(results[1], exc.HTTPNotFound)
+        self.assertEqual('stack_2/stack_2-id', results[2].identifier)
+
+
+class StackIdentifierCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(StackIdentifierCacheTest, self).setUp()
+        self.api = MagicMock()
+        self.api.json_request.return_value = (
+            {}, {'stack': {'id': 'abcd1234', 'stack_name': 'teststack'}})
+        self.cache = cache.LRUCache()
+
+    def test_resolve_stack_id_cached(self):
+        manager = StackChildManager(self.api, self.cache)
+        self.assertEqual('teststack/abcd1234',
+                         manager._resolve_stack_id('teststack'))
+        self.assertEqual('teststack/abcd1234',
+                         manager._resolve_stack_id('teststack'))
+        self.api.json_request.assert_called_once_with('GET',
+                                                      '/stacks/teststack')
+
+    def test_resolve_stack_id_not_cached(self):
+        manager = StackChildManager(self.api)
+        manager._resolve_stack_id('teststack')
+        manager._resolve_stack_id('teststack')
+        self.assertEqual(2, self.api.json_request.call_count)
+
+    def test_resolve_identifier(self):
+        manager = StackChildManager(self.api, self.cache)
+        self.assertEqual('teststack/abcd1234',
+                         manager._resolve_stack_id('teststack/abcd1234'))
+        self.assertFalse(self.api.json_request.called)
+
+    def test_delete_forgets_stack_id(self):
+        child_manager = StackChildManager(self.api, self.cache)
+        child_manager._resolve_stack_id('teststack')
+        child_manager._resolve_stack_id('abcd1234')
+        manager = StackManager(self.api, self.cache)
+        manager.delete('abcd1234')
+        self.assertEqual(0, len(self.cache))
+        self.api.raw_request.assert_called_once_with('DELETE',
+                                                     '/stacks/abcd1234')
+
+    def test_delete_by_id_forgets_stack_name(self):
+        child_manager = StackChildManager(self.api, self.cache)
+        child_manager._resolve_stack_id('teststack')
+        manager = StackManager(self.api, self.cache)
+        manager.delete('abcd1234')
+        self.assertEqual(0, len(self.cache))
+
+    def test_delete_by_name_forgets_stack_id(self):
+        child_manager = StackChildManager(self.api, self.cache)
+        child_manager._resolve_stack_id('abcd1234')
+        manager = StackManager(self.api, self.cache)
+        manager.delete('teststack')
+        self.assertEqual(0, len(self.cache))
+
+
+class StackManagerWaitTest(testtools.TestCase):
+
+    def setUp(self):
+        super(StackManagerWaitTest, self).setUp()
+        self.sleeps = []
+        self.patch(stacks.time, 'sleep', self.sleeps.append)
+        self.api = MagicMock()
+        self.manager = StackManager(self.api)
+
+    def _respond(self, statuses, updated_times=None):
+        statuses = list(statuses)
+        updated_times = list(updated_times or [None] * len(statuses))
+
+        def json_request(method, url):
+            stack = {'id': 'abcd1234', 'stack_name': 'teststack',
+                     'stack_status': statuses.pop(0),
+                     'updated_time': updated_times.pop(0)}
+            if url.startswith('/stacks?'):
+                return {}, {'stacks': [stack]}
+            return {}, {'stack': stack}
+        self.api.json_request.side_effect = json_request
+
+    def test_wait(self):
+        self._respond(['CREATE_IN_PROGRESS', 'CREATE_IN_PROGRESS',
+                       'CREATE_COMPLETE'])
+        result = self.manager.wait('teststack')
+        self.assertEqual('CREATE_COMPLETE', result.stack.stack_status)
+        self.assertEqual(3, result.polls)
+        self.assertEqual(2, len(self.sleeps))
+        self.assertEqual([
+            (('GET', '/stacks/teststack'),),
+            (('GET', '/stacks?id=abcd1234'),),
+            (('GET', '/stacks?id=abcd1234'),),
+        ], self.api.json_request.call_args_list)
+
+    def test_wait_backoff(self):
+        self._respond(['CREATE_IN_PROGRESS'] * 5 + ['CREATE_COMPLETE'])
+        self.manager.wait('teststack', poll_interval=1, max_poll_interval=4)
+        for sleep, interval in zip(self.sleeps, [1, 2, 4, 4, 4]):
+            self.assertTrue(interval * 0.5 <= sleep <= interval)
+
+    def test_wait_target_states(self):
+        self._respond(['UPDATE_COMPLETE', 'UPDATE_IN_PROGRESS',
+                       'UPDATE_COMPLETE'])
+        result = self.manager.wait('teststack',
+                                   target_states=('UPDATE_COMPLETE',))
+        self.assertEqual(1, result.polls)
+
+    def test_wait_other_terminal_state(self):
+        self._respond(['CREATE_IN_PROGRESS', 'CREATE_FAILED'])
+        result = self.manager.wait('teststack',
+                                   target_states=('CREATE_COMPLETE',))
+        self.assertEqual('CREATE_FAILED', result.stack.stack_status)
+        self.assertEqual(2, result.polls)
+
+    def test_wait_list_filter_ignored(self):
+        statuses = ['CREATE_IN_PROGRESS', 'CREATE_IN_PROGRESS',
+                    'CREATE_IN_PROGRESS', 'CREATE_COMPLETE']
+
+        def json_request(method, url):
+            stack = {'id': 'abcd1234', 'stack_name': 'teststack',
+                     'stack_status': statuses.pop(0)}
+            if url.startswith('/stacks?'):
+                other = {'id': 'efgh5678', 'stack_name': 'other',
+                         'stack_status': 'CREATE_COMPLETE'}
+                return {}, {'stacks': [other, stack]}
+            return {}, {'stack': stack}
+        self.api.json_request.side_effect = json_request
+        result = self.manager.wait('teststack')
+        self.assertEqual('CREATE_COMPLETE', result.stack.stack_status)
+        self.assertEqual([
+            (('GET', '/stacks/teststack'),),
+            (('GET', '/stacks?id=abcd1234'),),
+            (('GET', '/stacks/teststack/abcd1234'),),
+            (('GET', '/stacks/teststack/abcd1234'),),
+        ], self.api.json_request.call_args_list)
+
+    def test_wait_timeout(self):
+        self._respond(['CREATE_IN_PROGRESS'] * 3)
+        now = [0]
+
+        def sleep(seconds):
+            now[0] += 10
+        self.patch(stacks.time, 'sleep', sleep)
+        self.patch(stacks.time, 'time', lambda: now[0])
+        self.assertRaises(exc.Timeout, self.manager.wait, 'teststack',
+                          timeout=15)
+
+    def test_wait_deleted_stack(self):
+        self._respond(['DELETE_IN_PROGRESS', 'DELETE_COMPLETE'])
+        get = self.api.json_request.side_effect
+
+        def json_request(method, url):
+            if url.startswith('/stacks?'):
+                return {}, {'stacks': []}
+            return get(method, url)
+        self.api.json_request.side_effect = json_request
+        result = self.manager.wait('teststack')
+        self.assertEqual('DELETE_COMPLETE', result.stack.stack_status)
+        self.api.json_request.assert_called_with(
+            'GET', '/stacks/teststack/abcd1234')
+
+    def test_wait_event_callback(self):
+        self._respond(['CREATE_IN_PROGRESS', 'CREATE_COMPLETE'])
+        pages = [[MagicMock(id='1'), MagicMock(id='2')], []]
+        list_calls = []
+
+        def list_events(manager, stack_id, **kwargs):
+            list_calls.append(kwargs)
+            return iter(pages.pop(0))
+        self.patch(events.EventManager, 'list', list_events)
+        seen = []
+        self.manager.wait('teststack', event_callback=seen.append)
+        self.assertEqual(['1', '2'], [e.id for e in seen])
+        self.assertEqual([{'marker': None, 'sort_dir': 'asc'},
+                          {'marker': '2', 'sort_dir': 'asc'}], list_calls)
+
+    def test_wait_event_marker_ignored(self):
+        self._respond(['CREATE_IN_PROGRESS', 'CREATE_IN_PROGRESS',
+                       'CREATE_COMPLETE'])
+        pages = [['1', '2'], ['1', '2'], ['1', '2', '3']]
+
+        def list_events(manager, stack_id, **kwargs):
+            return iter([MagicMock(id=id) for id in pages.pop(0)])
+        self.patch(events.EventManager, 'list', list_events)
+        seen = []
+        self.manager.wait('teststack', event_callback=seen.append)
+        self.assertEqual(['1', '2', '3'], [e.id for e in seen])
+
+    def test_wait_previous_state(self):
+        previous = mock_stack(None, 'teststack', 'abcd1234')
+        previous.stack_status = 'UPDATE_COMPLETE'
+        self._respond(['UPDATE_COMPLETE', 'UPDATE_IN_PROGRESS',
+                       'UPDATE_COMPLETE'],
+                      [previous.updated_time, 't2', 't2'])
+        result = self.manager.wait('teststack',
+                                   target_states=('UPDATE_COMPLETE',),
+                                   previous=previous)
+        self.assertEqual(3, result.polls)
+
+    def test_wait_previous_updated_time(self):
+        previous = mock_stack(None, 'teststack', 'abcd1234')
+        self._respond(['UPDATE_COMPLETE', 'UPDATE_COMPLETE'],
+                      [previous.updated_time, 't2'])
+        result = self.manager.wait('teststack',
+                                   target_states=('UPDATE_COMPLETE',),
+                                   previous=previous)
+        self.assertEqual(2, result.polls)
+
+    def test_wait_event_manager_marker(self):
+        previous = mock_stack(None, 'teststack', 'abcd1234')
+        self._respond(['UPDATE_COMPLETE'], [previous.updated_time])
+        event_manager = MagicMock()
+        event_manager.list.return_value = iter([MagicMock(id='6')])
+        seen = []
+        result = self.manager.wait('teststack',
+                                   target_states=('UPDATE_COMPLETE',),
+                                   event_callback=seen.append,
+                                   event_manager=event_manager,
+                                   marker='5', previous=previous)
+        self.assertEqual(1, result.polls)
+        self.assertEqual(['6'], [e.id for e in seen])
+        event_manager.list.assert_called_once_with(
+            'teststack', marker='5', sort_dir='asc')
+
+
+class StackManagerListTest(testtools.TestCase):
+
+    def test_list_streamed(self):
+        api = MagicMock()
+        api.json_stream_request.side_effect = [
+            ({}, iter([{'id': '1', 'stack_name': 'stack_1'},
+                       {'id': '2', 'stack_name': 'stack_2'}])),
+            ({}, iter([{'id': '3', 'stack_name': 'stack_3'}])),
+        ]
+        manager = StackManager(api)
+        results = list(manager.list(page_size=2))
+        self.assertEqual(['1', '2', '3'], [s.id for s in results])
+        self.assertEqual([
+            (('GET', '/stacks?limit=2', 'stacks'),),
+            (('GET', '/stacks?limit=2&marker=2', 'stacks'),),
+        ], api.json_stream_request.call_args_list)
+        self.assertFalse(api.json_request.called)
+
+
+class StackManagerPrefetchTest(testtools.TestCase):
+
+    def test_stack_list_prefetch(self):
+        manager = StackManager(None)
+        urls = []
+
+        def mock_list(url, response_key):
+            urls.append(url)
+            start = len(urls) * 2 - 2
+            return [mock_stack(manager, 'stack_%s' % i, str(i))
+                    for i in range(start, min(start + 2, 5))]
+        manager._list_iter = MagicMock(side_effect=mock_list)
+
+        results = list(manager.list(page_size=2, prefetch=2))
+        self.assertEqual(['0', '1', '2', '3', '4'], [s.id for s in results])
+        self.assertEqual(['/stacks?limit=2',
+                          '/stacks?limit=2&marker=1',
+                          '/stacks?limit=2&marker=3'], urls)
+
+
+class StackManagerParallelListTest(testtools.TestCase):
+
+    def setUp(self):
+        super(StackManagerParallelListTest, self).setUp()
+        self.api = MagicMock()
+        self.api.thread_pool = concurrency.ThreadPool()
+        self.addCleanup(self.api.thread_pool.shutdown)
+        self.manager = StackManager(self.api)
+        self.stacks = [{'id': str(i), 'stack_name': 'stack_%s' % i}
+                       for i in range(7)]
+        self.urls = []
+
+    def _serve(self, with_offset=True, with_count=True):
+        def json_request(method, url):
+            self.urls.append(url)
+            query = dict(urlparse.parse_qsl(urlparse.urlparse(url).query))
+            start = 0
+            if 'marker' in query:
+                start = int(query['marker']) + 1
+            if with_offset and 'offset' in query:
+                start = int(query['offset'])
+            body = {'stacks': self.stacks[start:start + int(query['limit'])]}
+            if with_count and 'with_count' in query:
+                body['count'] = len(self.stacks)
+            return {}, body
+
+        def json_stream_request(method, url, response_key):
+            resp, body = json_request(method, url)
+            return resp, iter(body[response_key])
+        self.api.json_request.side_effect = json_request
+        self.api.json_stream_request.side_effect = json_stream_request
+
+    def test_list_parallel(self):
+        self._serve()
+        results = list(self.manager.list(page_size=2, parallel=True))
+        self.assertEqual([str(i) for i in range(7)], [s.id for s in results])
+        self.assertEqual('/stacks?limit=2&with_count=true', self.urls[0])
+        self.assertEqual(['/stacks?limit=2&offset=2',
+                          '/stacks?limit=2&offset=4',
+                          '/stacks?limit=2&offset=6'],
+                         sorted(self.urls[1:]))
+
+    def test_list_parallel_lazy(self):
+        self._serve()
+        results = self.manager.list(page_size=2, parallel=True)
+        self.assertEqual([], self.urls)
+        self.assertEqual('0', next(results).id)
+        self.assertEqual(4, len(self.urls))
+
+    def test_list_parallel_compact(self):
+        self._serve()
+        self.manager.compact_resources = True
+        results = list(self.manager.list(page_size=2, parallel=True))
+        self.assertEqual([str(i) for i in range(7)], [s.id for s in results])
+        for stack in results:
+            self.assertIsInstance(stack._info, base.Record)
+
+    def test_list_parallel_limit(self):
+        self._serve()
+        results = list(self.manager.list(page_size=2, limit=3,
+                                         parallel=True))
+        self.assertEqual(['0', '1', '2'], [s.id for s in results])
+        self.assertEqual(2, len(self.urls))
+
+    def test_list_parallel_no_count(self):
+        self._serve(with_count=False)
+        results = list(self.manager.list(page_size=3, parallel=True))
+        self.assertEqual([str(i) for i in range(7)], [s.id for s in results])
+        self.assertEqual(['/stacks?limit=3&with_count=true',
+                          '/stacks?limit=3&marker=2',
+                          '/stacks?limit=3&marker=5'], self.urls)
+
+    def test_list_parallel_offset_ignored(self):
+        self._serve(with_offset=False)
+        results = list(self.manager.list(page_size=3, parallel=True))
+        self.assertEqual([str(i) for i in range(7)], [s.id for s in results])
+        self.assertEqual(['/stacks?limit=3&marker=2',
+                          '/stacks?limit=3&marker=5'], self.urls[-2:])
+
+
 class StackManagerNoPaginationTest(testtools.TestCase):
 
     scenarios = [
@@ -118,7 +488,7 @@ class StackManagerNoPaginationTest(testtools.TestCase):
 
     def mock_manager(self):
         manager = StackManager(None)
-        manager._list = MagicMock()
+        manager._list_iter = MagicMock()
 
         def mock_list(*args, **kwargs):
             def results():
@@ -129,13 +499,13 @@ class StackManagerNoPaginationTest(testtools.TestCase):
 
             return list(results())
 
-        manager._list.side_effect = mock_list
+        manager._list_iter.side_effect = mock_list
         return manager
 
     def test_stack_list_no_pagination(self):
         manager = self.mock_manager()
         results = list(manager.list(limit=self.limit))
-        manager._list.assert_called_once_with(
+        manager._list_iter.assert_called_once_with(
             '/stacks?', 'stacks')
 
         last_result = min(self.limit, self.total)
@@ -151,7 +521,7 @@ class StackManagerNoPaginationTest(testtools.TestCase):
         manager = self.mock_manager()
 
         results = list(manager.list())
-        manager._list.assert_called_once_with(
+        manager._list_iter.assert_called_once_with(
             '/stacks?', 'stacks')
 
         # paginate is not specified, so the total
@@ -245,7 +615,7 @@ class StackManagerPaginationTest(testtools.TestCase):
 
     def mock_manager(self):
         manager = StackManager(None)
-        manager._list = MagicMock()
+        manager._list_iter = MagicMock()
 
         def mock_list(arg_url, arg_response_key):
             try:
@@ -270,7 +640,7 @@ class StackManagerPaginationTest(testtools.TestCase):
 
             return list(results())
 
-        manager._list.side_effect = mock_list
+        manager._list_iter.side_effect = mock_list
         return manager
 
     def test_stack_list_pagination(self):
@@ -0,0 +1,62 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+import yaml
+
+from heatclient.common import template_format
+from heatclient.common import utils
+
+
+class YamlTest(testtools.TestCase):
+
+    template = '''
+heat_template_version: 2013-05-23
+description: A template with 'quotes' and unicode \xc3\xa9
+parameters:
+  flavor: {type: string, default: m1.small}
+resources:
+  server:
+    type: OS::Nova::Server
+    properties:
+      flavor: {get_param: flavor}
+      user_data: |
+        #!/bin/sh
+        echo 0123
+      ports: [1, 2.5, true, null, '3']
+'''
+
+    def test_libyaml_used(self):
+        if yaml.__with_libyaml__:
+            self.assertIs(yaml.CSafeLoader, template_format.yaml_loader)
+            self.assertIs(yaml.CSafeDumper, template_format.yaml_dumper)
+        else:
+            self.assertIs(yaml.SafeLoader, template_format.yaml_loader)
+            self.assertIs(yaml.SafeDumper, template_format.yaml_dumper)
+
+    def test_load_same_as_safe_load(self):
+        self.assertEqual(yaml.safe_load(self.template),
+                         template_format.yaml_load(self.template))
+
+    def test_dump_same_as_safe_dump(self):
+        template = yaml.safe_load(self.template)
+        self.assertEqual(yaml.safe_dump(template, indent=2),
+                         template_format.yaml_dump(template, indent=2))
+        self.assertEqual(template, template_format.yaml_load(
+            template_format.yaml_dump(template)))
+
+    def test_load_is_safe(self):
+        self.assertRaises(yaml.YAMLError, template_format.yaml_load,
+                          '!!python/object/apply:os.system ["ls"]')
+
+    def test_format_output(self):
+        self.assertEqual('a: 1\n', utils.format_output({'a': 1}))
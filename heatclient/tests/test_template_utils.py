@@ -0,0 +1,256 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+import mock
+from six.moves.urllib import error as urllib_error
+from six.moves.urllib import request as urllib_request
+import testtools
+
+from heatclient.common import template_utils
+from heatclient import exc
+from heatclient.openstack.common.py3kcompat import urlutils
+
+
+class TemplateReferencesTest(testtools.TestCase):
+
+    def test_template_references(self):
+        template = template_utils.parse_template('''
+        heat_template_version: 2013-05-23
+        resources:
+          server:
+            type: OS::Nova::Server
+            properties:
+              user_data: {get_file: boot.sh}
+              metadata:
+                files: [{get_file: a.txt}, {get_file: b.txt}]
+          group:
+            type: group.yaml
+          remote:
+            type: http://example.com/remote
+        ''')
+        files, nested = template_utils.template_references(template)
+        self.assertEqual(['a.txt', 'b.txt', 'boot.sh'], files)
+        self.assertEqual(['group.yaml', 'http://example.com/remote'], nested)
+
+    def test_parse_template(self):
+        self.assertEqual({'a': 1}, template_utils.parse_template('{"a": 1}'))
+        self.assertEqual({'a': 1}, template_utils.parse_template({'a': 1}))
+        self.assertIsNone(template_utils.parse_template('#!/bin/sh\nls'))
+        self.assertIsNone(template_utils.parse_template('{"a": '))
+        self.assertIsNone(template_utils.parse_template('a: [b'))
+
+
+class GetNestedFilesTest(testtools.TestCase):
+
+    def setUp(self):
+        super(GetNestedFilesTest, self).setUp()
+        self.fetched = []
+        self.urls = {}
+        self.patch(template_utils, 'read_url', self.read_url)
+
+    def read_url(self, url):
+        self.fetched.append(url)
+        if url not in self.urls:
+            raise urlutils.URLError('not found')
+        return self.urls[url]
+
+    def test_nested(self):
+        template = '''
+        heat_template_version: 2013-05-23
+        resources:
+          server:
+            type: OS::Nova::Server
+            properties:
+              user_data: {get_file: scripts/boot.sh}
+          group:
+            type: nested/group.yaml
+        '''
+        self.urls = {
+            'file:///t/scripts/boot.sh': '#!/bin/sh',
+            'file:///t/nested/group.yaml': '''
+            resources:
+              member:
+                type: member.yaml
+            ''',
+            'file:///t/nested/member.yaml': '''
+            resources:
+              config:
+                type: OS::Heat::None
+                properties:
+                  config: {get_file: ../scripts/boot.sh}
+            ''',
+        }
+        files = {}
+        template_utils.get_nested_files([('file:///t/main.yaml', template)],
+                                        files)
+        self.assertEqual({
+            'scripts/boot.sh': '#!/bin/sh',
+            'nested/group.yaml': self.urls['file:///t/nested/group.yaml'],
+            'member.yaml': self.urls['file:///t/nested/member.yaml'],
+            '../scripts/boot.sh': '#!/bin/sh',
+        }, files)
+        # Each URL is fetched once, a level at a time
+        self.assertEqual(['file:///t/nested/group.yaml',
+                          'file:///t/scripts/boot.sh'],
+                         sorted(self.fetched[:2]))
+        self.assertEqual(['file:///t/nested/member.yaml'], self.fetched[2:])
+
+    def test_cycle(self):
+        self.urls = {
+            'file:///t/a.yaml': 'resources: {b: {type: b.yaml}}',
+            'file:///t/b.yaml': 'resources: {a: {type: a.yaml}}',
+        }
+        files = {}
+        template_utils.get_nested_files(
+            [('file:///t/main.yaml', 'resources: {a: {type: a.yaml}}')],
+            files)
+        self.assertEqual(['a.yaml', 'b.yaml'], sorted(files))
+        self.assertEqual(['file:///t/a.yaml', 'file:///t/b.yaml'],
+                         self.fetched)
+
+    def test_identical_contents_shared(self):
+        self.urls = {
+            'file:///t/a.sh': 'x' * 10,
+            'file:///t/b.sh': 'x' * 10,
+        }
+        files = {}
+        template_utils.get_nested_files([(
+            'file:///t/main.yaml',
+            {'resources': {'a': {'properties': {'a': {'get_file': 'a.sh'},
+                                                'b': {'get_file': 'b.sh'}}}}}
+        )], files)
+        self.assertEqual('x' * 10, files['a.sh'])
+        self.assertIs(files['a.sh'], files['b.sh'])
+
+    def test_fetch_error(self):
+        self.urls = {'file:///t/a.sh': 'a'}
+        template = 'resources: {a: {type: missing.yaml, ' \
+                   'properties: {a: {get_file: a.sh}}}}'
+        e = self.assertRaises(exc.CommandError,
+                              template_utils.get_nested_files,
+                              [('file:///t/main.yaml', template)], {})
+        self.assertEqual('Could not fetch file:///t/missing.yaml', str(e))
+
+    def test_conflicting_paths(self):
+        self.urls = {
+            'file:///t/a/nested.yaml': 'resources: {x: {type: x.yaml}}',
+            'file:///t/b/nested.yaml': 'resources: {x: {type: x.yaml}}',
+            'file:///t/a/x.yaml': 'a',
+            'file:///t/b/x.yaml': 'b',
+        }
+        template = ('resources: {a: {type: a/nested.yaml}, '
+                    'b: {type: b/nested.yaml}}')
+        self.assertRaises(exc.CommandError,
+                          template_utils.get_nested_files,
+                          [('file:///t/main.yaml', template)], {})
+
+
+class ContentCacheTest(testtools.TestCase):
+
+    def setUp(self):
+        super(ContentCacheTest, self).setUp()
+        self.tmp = self.useFixture(fixtures.TempDir()).path
+        self.content_cache = template_utils.ContentCache(
+            os.path.join(self.tmp, 'cache'))
+
+    def test_file_url(self):
+        path = os.path.join(self.tmp, 'boot.sh')
+        with open(path, 'w') as f:
+            f.write('#!/bin/sh')
+        str_url = 'file:' + urllib_request.pathname2url(path)
+        self.assertEqual('#!/bin/sh', self.content_cache.read(str_url))
+        # Local files are read directly, not copied to the cache
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'cache')))
+
+    def test_file_url_missing(self):
+        str_url = 'file:' + urllib_request.pathname2url(
+            os.path.join(self.tmp, 'missing.sh'))
+        self.assertRaises(urlutils.URLError,
+                          self.content_cache.read, str_url)
+
+    def _response(self, body, headers):
+        resp = mock.Mock()
+        resp.read.return_value = body
+        resp.info.return_value = headers
+        return resp
+
+    def test_http_url_revalidated(self):
+        urlopen = mock.Mock()
+        self.patch(urlutils, 'urlopen', urlopen)
+        str_url = 'http://example.com/boot.sh'
+
+        urlopen.return_value = self._response('#!/bin/sh', {'etag': '"1"'})
+        self.assertEqual('#!/bin/sh', self.content_cache.read(str_url))
+        request = urlopen.call_args[0][0]
+        self.assertIsNone(request.get_header('If-none-match'))
+
+        urlopen.side_effect = urllib_error.HTTPError(
+            str_url, 304, 'Not Modified', {}, None)
+        self.assertEqual('#!/bin/sh', self.content_cache.read(str_url))
+        request = urlopen.call_args[0][0]
+        self.assertEqual('"1"', request.get_header('If-none-match'))
+
+    def test_http_url_bytes(self):
+        urlopen = mock.Mock()
+        self.patch(urlutils, 'urlopen', urlopen)
+        str_url = 'http://example.com/image.bin'
+        content = b'\x89PNG\xff\xfe'
+        urlopen.return_value = self._response(content, {'etag': '"1"'})
+        self.assertEqual(content, self.content_cache.read(str_url))
+        urlopen.side_effect = urllib_error.HTTPError(
+            str_url, 304, 'Not Modified', {}, None)
+        cached = self.content_cache.read(str_url)
+        self.assertEqual(content, cached)
+        self.assertIs(type(content), type(cached))
+
+    def test_max_entries(self):
+        content_cache = template_utils.ContentCache(
+            os.path.join(self.tmp, 'bounded'), max_entries=2)
+        urlopen = mock.Mock()
+        self.patch(urlutils, 'urlopen', urlopen)
+        for i, name in enumerate(['a', 'b', 'c']):
+            urlopen.return_value = self._response(name, {'etag': '"1"'})
+            content_cache.read('http://example.com/%s' % name)
+            # Order the writes for the pruning
+            for path in os.listdir(os.path.join(self.tmp, 'bounded')):
+                path = os.path.join(self.tmp, 'bounded', path)
+                mtime = os.path.getmtime(path)
+                os.utime(path, (mtime - 10, mtime - 10))
+        self.assertEqual(4, len(os.listdir(os.path.join(self.tmp,
+                                                        'bounded'))))
+        self.assertIsNone(content_cache._entries.get('http://example.com/a'))
+
+    def test_http_url_not_cacheable(self):
+        urlopen = mock.Mock()
+        self.patch(urlutils, 'urlopen', urlopen)
+        str_url = 'http://example.com/boot.sh'
+        urlopen.return_value = self._response('#!/bin/sh', {})
+        self.content_cache.read(str_url)
+        self.content_cache.read(str_url)
+        request = urlopen.call_args[0][0]
+        self.assertIsNone(request.get_header('If-none-match'))
+        self.assertIsNone(request.get_header('If-modified-since'))
+
+    def test_get_nested_files(self):
+        path = os.path.join(self.tmp, 'nested.yaml')
+        with open(path, 'w') as f:
+            f.write('resources: {}')
+        template_url = 'file:' + urllib_request.pathname2url(
+            os.path.join(self.tmp, 'main.yaml'))
+        files = {}
+        template_utils.get_nested_files(
+            [(template_url, 'resources: {a: {type: nested.yaml}}')], files,
+            content_cache=self.content_cache)
+        self.assertEqual({'nested.yaml': 'resources: {}'}, files)
@@ -13,7 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import os
+
+from heatclient.common import base
+from heatclient.common import cache
+from heatclient.common import concurrency
 from heatclient.common import http
+from heatclient.openstack.common import strutils
 from heatclient.v1 import actions
 from heatclient.v1 import events
 from heatclient.v1 import resource_types
@@ -29,14 +36,94 @@ class Client(http.HTTPClient):
     :param string token: Token for authentication.
     :param integer timeout: Allows customization of the timeout for client
                             http requests. (optional)
+    :param integer pool_size: Maximum number of idle keep-alive connections
+                              kept for reuse, 0 disables connection
+                              pooling. (optional)
+    :param integer pool_idle_timeout: Number of seconds an idle connection
+                                      is kept in the pool. (optional)
+    :param integer log_body_limit: Maximum number of characters of request
+                                   and response bodies written to the debug
+                                   log. (optional)
+    :param integer redirect_cache_size: Number of permanent redirects
+                                        remembered by the client. (optional)
+    :param integer response_cache_size: Number of GET responses kept to be
+                                        revalidated with their ETag or
+                                        Last-Modified header, 0 disables
+                                        the cache. Defaults to 0.
+                                        (optional)
+    :param integer max_workers: Maximum number of requests the client runs
+                                concurrently on its worker threads, 0
+                                runs them in the calling thread.
+                                (optional)
+    :param bool cache_stack_ids: Whether the stack name to identifier
+                                 lookups made for resource and event
+                                 requests are cached. Defaults to True.
+    :param integer stack_id_cache_size: Number of cached stack identifiers.
+                                        (optional)
+    :param integer stack_id_cache_ttl: Number of seconds a stack identifier
+                                       is cached for. (optional)
+    :param integer resource_type_cache_ttl: Number of seconds the resource
+                                            types of the endpoint are cached
+                                            on disk for, 0 disables the
+                                            cache. Defaults to 0. (optional)
+    :param string cache_dir: Directory of the on-disk caches. Defaults to
+                             $XDG_CACHE_HOME/heatclient. (optional)
+    :param bool compact_resources: Whether listed objects keep their fields
+                                   in compact records, which use less
+                                   memory for long lists. (optional)
+    :param string lazy_load: What to do when reading an attribute missing
+                             from an object which is not fully loaded:
+                             'allow' loads it, 'warn' also logs a warning
+                             and 'forbid' raises LazyLoadForbidden.
+                             Defaults to 'allow'. The loads made are
+                             counted in the lazy_loads attribute.
+
+    Calls made through the futures attribute run on the client's worker
+    threads and return a Future instead of blocking, e.g.
+    ``client.futures.stacks.get(stack_id).result()``. The Future of a list
+    call holds the list of all the items, fetched on the worker thread.
     """
 
     def __init__(self, *args, **kwargs):
         """Initialize a new client for the Heat v1 API."""
         self.http_client = http.HTTPClient(*args, **kwargs)
-        self.stacks = stacks.StackManager(self.http_client)
-        self.resources = resources.ResourceManager(self.http_client)
+        identifier_cache = None
+        if kwargs.get('cache_stack_ids', True):
+            identifier_cache = cache.LRUCache(
+                int(kwargs.get('stack_id_cache_size',
+                               stacks.DEFAULT_IDENTIFIER_CACHE_SIZE)),
+                ttl=float(kwargs.get('stack_id_cache_ttl',
+                                     stacks.DEFAULT_IDENTIFIER_CACHE_TTL)))
+        self.stacks = stacks.StackManager(self.http_client, identifier_cache)
+        self.resources = resources.ResourceManager(self.http_client,
+                                                   identifier_cache)
+        type_cache = None
+        type_cache_ttl = float(kwargs.get('resource_type_cache_ttl') or 0)
+        if type_cache_ttl > 0:
+            # Each endpoint has its own directory of cached types
+            endpoint_hash = hashlib.sha1(
+                strutils.safe_encode(self.http_client.endpoint)).hexdigest()
+            type_cache_dir = os.path.join(
+                kwargs.get('cache_dir') or cache.user_cache_dir(),
+                'resource_types', endpoint_hash)
+            type_cache = cache.DiskCache(type_cache_dir, ttl=type_cache_ttl)
         self.resource_types = resource_types.ResourceTypeManager(
-            self.http_client)
-        self.events = events.EventManager(self.http_client)
-        self.actions = actions.ActionManager(self.http_client)
+            self.http_client, type_cache)
+        self.events = events.EventManager(self.http_client, identifier_cache)
+        self.actions = actions.ActionManager(self.http_client,
+                                             identifier_cache)
+        self.lazy_loads = base.LazyLoadCounter()
+        lazy_load = kwargs.get('lazy_load', base.LAZY_LOAD_ALLOW)
+        if lazy_load not in base.LAZY_LOAD_POLICIES:
+            raise ValueError('Invalid lazy_load policy: %s' % lazy_load)
+        for manager in (self.stacks, self.resources, self.resource_types,
+                        self.events, self.actions):
+            manager.compact_resources = bool(kwargs.get('compact_resources'))
+            manager.lazy_load = lazy_load
+            manager.lazy_load_counter = self.lazy_loads
+        self.futures = concurrency.FutureProxy(self,
+                                               self.http_client.thread_pool)
+
+    def close(self):
+        """Stop the worker threads and close all idle connections."""
+        self.http_client.close()
@@ -13,12 +13,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 from heatclient.common import base
+from heatclient import exc
 from heatclient.openstack.common.py3kcompat import urlutils
 from heatclient.openstack.common import strutils
 from heatclient.v1 import stacks
 
 DEFAULT_PAGE_SIZE = 20
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_MAX_POLL_INTERVAL = 30
 
 
 class Event(base.Resource):
@@ -38,21 +43,123 @@ class Event(base.Resource):
 class EventManager(stacks.StackChildManager):
     resource_class = Event
 
-    def list(self, stack_id, resource_name=None):
+    def list(self, stack_id, resource_name=None, **kwargs):
         """Get a list of events.
         :param stack_id: ID of stack the events belong to
         :param resource_name: Optional name of resources to filter events by
-        :rtype: list of :class:`Event`
+        :param page_size: number of items to request in each paginated request
+        :param limit: maximum number of events to return
+        :param marker: begin returning events that appear later in the event
+                       list than that represented by this event id
+        :param resource_status: only return events with this resource status
+        :param resource_action: only return events with this resource action
+        :param sort_dir: direction to sort the events in, asc or desc
+        :param prefetch: number of pages to fetch ahead on a background
+                         thread while the events are consumed
+        :rtype: generator of :class:`Event`
         """
         if resource_name is None:
             url = '/stacks/%s/events' % stack_id
         else:
-            stack_id = self._resolve_stack_id(stack_id)
+            identifier = self._resolve_stack_id(stack_id)
             # Use urlutils for python2/python3 compatibility
             url = '/stacks/%s/resources/%s/events' % (
-                  urlutils.quote(stack_id, ''),
+                  urlutils.quote(identifier, ''),
                   urlutils.quote(strutils.safe_encode(resource_name), ''))
-        return self._list(url, "events")
+
+        params = {}
+        if 'page_size' in kwargs:
+            params['limit'] = kwargs['page_size']
+        for key in ('marker', 'resource_status', 'resource_action',
+                    'sort_dir'):
+            if kwargs.get(key) is not None:
+                params[key] = kwargs[key]
+
+        def fetch_page(qp):
+            page_url = url
+            if qp:
+                sort_qp = sorted(qp.items(), key=lambda x: x[0])
+                page_url = '%s?%s' % (url, urlutils.urlencode(sort_qp))
+            try:
+                return list(self._list_iter(page_url, "events"))
+            except exc.HTTPNotFound:
+                self._forget_stack_id(stack_id)
+                raise
+
+        return self._paginate(fetch_page, params, kwargs.get('limit'),
+                              kwargs.get('prefetch', 0))
+
+    def watch(self, stack_id, resource_name=None,
+              poll_interval=DEFAULT_POLL_INTERVAL,
+              max_poll_interval=DEFAULT_MAX_POLL_INTERVAL):
+        """Follow the events of a stack as they happen.
+
+        The existing events are yielded first, then only the events newer
+        than the last one seen are requested. While no new events arrive
+        the stack status is checked and the polling interval doubles, up
+        to max_poll_interval. The watch ends once the stack status is
+        *_COMPLETE or *_FAILED, or the stack is gone.
+
+        :param stack_id: ID of stack the events belong to
+        :param resource_name: Optional name of resources to filter events by
+        :param poll_interval: initial number of seconds between polls
+        :param max_poll_interval: maximum number of seconds between polls
+        :rtype: generator of :class:`Event`
+        """
+        marker = None
+        # IDs of the events yielded, in case the server ignores the marker
+        seen = set()
+        interval = poll_interval
+        finished = False
+        while True:
+            try:
+                events = [event for event in self.list(stack_id,
+                                                       resource_name,
+                                                       marker=marker,
+                                                       sort_dir='asc')
+                          if event.id not in seen]
+            except exc.HTTPNotFound:
+                if marker is None and not finished:
+                    raise
+                return
+            for event in events:
+                seen.add(event.id)
+                yield event
+            if events:
+                marker = events[-1].id
+
+            if finished:
+                return
+            if events:
+                interval = poll_interval
+            else:
+                finished = self._stack_finished(stack_id)
+                if finished:
+                    # Poll once more for events logged just before the
+                    # status changed
+                    continue
+                interval = min(interval * 2, max_poll_interval)
+            time.sleep(interval)
+
+    def _stack_finished(self, stack_id):
+        try:
+            resp, body = self.api.json_request('GET',
+                                               '/stacks/%s' % stack_id)
+        except exc.HTTPNotFound:
+            return True
+        status = body['stack']['stack_status']
+        return status.endswith('_COMPLETE') or status.endswith('_FAILED')
+
+    def list_many(self, stack_ids):
+        """Get the lists of events of many stacks concurrently.
+
+        :param stack_ids: IDs of stacks the events belong to
+        :rtype: list of lists of :class:`Event`, in the order of
+                stack_ids, with the exception raised in place of the
+                events of each stack which could not be listed
+        """
+        return self._map(lambda stack_id: list(self.list(stack_id)),
+                         stack_ids)
 
     def get(self, stack_id, resource_name, event_id):
         """Get the details for a specific event.
@@ -61,11 +168,15 @@ class EventManager(stacks.StackChildManager):
         :param resource_name: ID of resource the event belongs to
         :param event_id: ID of event to get the details for
         """
-        stack_id = self._resolve_stack_id(stack_id)
+        identifier = self._resolve_stack_id(stack_id)
         # Use urlutils for python2/python3 compatibility
         url_str = '/stacks/%s/resources/%s/events/%s' % (
-                  urlutils.quote(stack_id, ''),
+                  urlutils.quote(identifier, ''),
                   urlutils.quote(strutils.safe_encode(resource_name), ''),
                   urlutils.quote(event_id, ''))
-        resp, body = self.api.json_request('GET', url_str)
+        try:
+            resp, body = self.api.json_request('GET', url_str)
+        except exc.HTTPNotFound:
+            self._forget_stack_id(stack_id)
+            raise
         return Event(self, body['event'])
@@ -30,11 +30,24 @@ class ResourceType(base.Resource):
 class ResourceTypeManager(base.Manager):
     resource_class = ResourceType
 
+    def __init__(self, api, disk_cache=None):
+        super(ResourceTypeManager, self).__init__(api)
+        self.disk_cache = disk_cache
+
     def list(self):
         """Get a list of resource types.
         :rtype: list of :class:`ResourceType`
         """
-        return self._list('/resource_types', 'resource_types')
+        url = '/resource_types'
+        if self.disk_cache is not None:
+            names = self.disk_cache.get(url)
+            if names is not None:
+                return [ResourceType(self, name, loaded=True)
+                        for name in names]
+        types = self._list(url, 'resource_types')
+        if self.disk_cache is not None:
+            self.disk_cache.set(url, [t.resource_type for t in types])
+        return types
 
     def get(self, resource_type):
         """Get the details for a specific resource_type.
@@ -43,5 +56,19 @@ class ResourceTypeManager(base.Manager):
         """
         url_str = '/resource_types/%s' % (
                   urlutils.quote(strutils.safe_encode(resource_type), ''))
-        resp, body = self.api.json_request('GET', url_str)
+        return self._cached_get(url_str)
+
+    def invalidate_cache(self):
+        """Drop the resource types cached on disk for this endpoint."""
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def _cached_get(self, url):
+        if self.disk_cache is not None:
+            body = self.disk_cache.get(url)
+            if body is not None:
+                return body
+        resp, body = self.api.json_request('GET', url)
+        if self.disk_cache is not None:
+            self.disk_cache.set(url, body)
         return body
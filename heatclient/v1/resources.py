@@ -14,6 +14,7 @@
 #    under the License.
 
 from heatclient.common import base
+from heatclient import exc
 from heatclient.openstack.common.py3kcompat import urlutils
 from heatclient.openstack.common import strutils
 from heatclient.v1 import stacks
@@ -51,26 +52,47 @@ class ResourceManager(stacks.StackChildManager):
         :param stack_id: ID of stack containing the resource
         :param resource_name: ID of resource to get the details for
         """
-        stack_id = self._resolve_stack_id(stack_id)
+        identifier = self._resolve_stack_id(stack_id)
         # Use urlutils for python2/python3 compatibility
         url_str = '/stacks/%s/resources/%s' % (
-                  urlutils.quote(stack_id, ''),
+                  urlutils.quote(identifier, ''),
                   urlutils.quote(strutils.safe_encode(resource_name), ''))
-        resp, body = self.api.json_request('GET', url_str)
+        try:
+            resp, body = self.api.json_request('GET', url_str)
+        except exc.HTTPNotFound:
+            self._forget_stack_id(stack_id)
+            raise
         return Resource(self, body['resource'])
 
+    def get_many(self, stack_id, resource_names):
+        """Get the details for many resources of a stack concurrently.
+
+        :param stack_id: ID of stack containing the resources
+        :param resource_names: IDs of resources to get the details for
+        :rtype: list of :class:`Resource`, in the order of resource_names,
+                with the exception raised in place of each resource which
+                could not be fetched
+        """
+        stack_id = self._resolve_stack_id(stack_id)
+        return self._map(lambda name: self.get(stack_id, name),
+                         resource_names)
+
     def metadata(self, stack_id, resource_name):
         """Get the metadata for a specific resource.
 
         :param stack_id: ID of stack containing the resource
         :param resource_name: ID of resource to get metadata for
         """
-        stack_id = self._resolve_stack_id(stack_id)
+        identifier = self._resolve_stack_id(stack_id)
         # Use urlutils for python2/python3 compatibility
         url_str = '/stacks/%s/resources/%s/metadata' % (
-                  urlutils.quote(stack_id, ''),
+                  urlutils.quote(identifier, ''),
                   urlutils.quote(strutils.safe_encode(resource_name), ''))
-        resp, body = self.api.json_request('GET', url_str)
+        try:
+            resp, body = self.api.json_request('GET', url_str)
+        except exc.HTTPNotFound:
+            self._forget_stack_id(stack_id)
+            raise
         return body['metadata']
 
     def generate_template(self, resource_name):
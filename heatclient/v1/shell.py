@@ -16,13 +16,21 @@
 import json
 import os
 import urllib
-import yaml
 
+from heatclient.common import cache
+from heatclient.common import template_format
+from heatclient.common import template_utils
 from heatclient.common import utils
 from heatclient.openstack.common.py3kcompat import urlutils
 
 import heatclient.exc as exc
 
+# Terminal states of a stack action, the successful one first
+STACK_CREATE_STATES = ('CREATE_COMPLETE', 'CREATE_FAILED',
+                       'ROLLBACK_COMPLETE', 'ROLLBACK_FAILED')
+STACK_UPDATE_STATES = ('UPDATE_COMPLETE', 'UPDATE_FAILED',
+                       'ROLLBACK_COMPLETE', 'ROLLBACK_FAILED')
+
 
 def _set_template_fields(hc, args, fields):
     if args.template_file:
@@ -48,18 +56,43 @@ def _set_template_fields(hc, args, fields):
 
 def _get_file_contents(resource_registry, fields, base_url='',
                        ignore_if=None):
-    for key, value in iter(resource_registry.items()):
-        if ignore_if and ignore_if(key, value):
-            continue
+    _get_registry_files([(resource_registry, base_url)], fields, ignore_if)
+
+
+def _get_registry_files(registries, fields, ignore_if=None,
+                        content_cache=None):
+    """Fetch the files of resource registries into fields['files'].
 
+    Each distinct URL is fetched once, concurrently with the others, and
+    the registry entries are replaced with the absolute URLs.
+
+    :param registries: list of (resource_registry, base_url) tuples
+    :param content_cache: optional template_utils.ContentCache to read
+                          through
+    """
+    entries = []
+    for resource_registry, base_url in registries:
         if base_url != '' and not base_url.endswith('/'):
             base_url = base_url + '/'
-        str_url = base_url + value
-        try:
-            fields['files'][str_url] = urlutils.urlopen(str_url).read()
-        except urlutils.URLError:
-            raise exc.CommandError('Could not fetch %s from the environment'
-                                   % str_url)
+        for key, value in iter(resource_registry.items()):
+            if ignore_if and ignore_if(key, value):
+                continue
+            entries.append((resource_registry, key, base_url + value))
+
+    urls = []
+    for resource_registry, key, str_url in entries:
+        if str_url not in urls:
+            urls.append(str_url)
+    contents = dict(zip(urls, template_utils.fetch_urls(
+        urls, content_cache=content_cache)))
+
+    failed = [str_url for str_url in urls
+              if isinstance(contents[str_url], urlutils.URLError)]
+    if failed:
+        raise exc.CommandError('Could not fetch %s from the environment'
+                               % ', '.join(failed))
+    for resource_registry, key, str_url in entries:
+        fields['files'][str_url] = contents[str_url]
         resource_registry[key] = str_url
 
 
@@ -69,19 +102,43 @@ def _prepare_environment_file(environment_file):
         'file:', urllib.pathname2url(environment_dir))
 
     raw_env = open(environment_file).read()
-    env = yaml.safe_load(raw_env)
+    env = template_format.yaml_load(raw_env)
     return environment_url, env
 
 
-def _process_environment_and_files(args, fields):
-    if not args.environment_file:
-        return
-
-    environment_url, env = _prepare_environment_file(args.environment_file)
-    _resolve_environment_urls(fields, environment_url, env)
+def _content_cache(args):
+    if not getattr(args, 'template_cache', False):
+        return None
+    cache_dir = getattr(args, 'cache_dir', None) or cache.user_cache_dir()
+    return template_utils.ContentCache(os.path.join(cache_dir, 'files'))
 
 
-def _resolve_environment_urls(fields, environment_url, env):
+def _process_environment_and_files(args, fields):
+    content_cache = _content_cache(args)
+    if args.environment_file:
+        environment_url, env = _prepare_environment_file(
+            args.environment_file)
+        _resolve_environment_urls(fields, environment_url, env,
+                                  content_cache)
+    _resolve_nested_files(args, fields, content_cache)
+
+
+def _resolve_nested_files(args, fields, content_cache=None):
+    files = fields.get('files', {})
+    roots = sorted(files.items())
+    if args.template_file and 'template' in fields:
+        template_url = urlutils.urljoin(
+            'file:', urllib.pathname2url(os.path.abspath(args.template_file)))
+        roots.insert(0, (template_url, fields['template']))
+
+    template_utils.get_nested_files(roots, files,
+                                    content_cache=content_cache)
+    if files:
+        fields['files'] = files
+
+
+def _resolve_environment_urls(fields, environment_url, env,
+                              content_cache=None):
     fields['environment'] = env
     fields['files'] = {}
 
@@ -98,11 +155,11 @@ def _resolve_environment_urls(fields, environment_url, env):
             # don't need downloading.
             return True
 
-    _get_file_contents(rr, fields, base_url, ignore_if)
-
+    registries = [(rr, base_url)]
     for res_name, res_dict in iter(rr.get('resources', {}).items()):
         res_base_url = res_dict.get('base_url', base_url)
-        _get_file_contents(res_dict, fields, res_base_url, ignore_if)
+        registries.append((res_dict, res_base_url))
+    _get_registry_files(registries, fields, ignore_if, content_cache)
 
 
 @utils.arg('-f', '--template-file', metavar='<FILE>',
@@ -148,6 +205,8 @@ def do_create(hc, args):
            'This can be specified multiple times, or once with parameters '
            'separated by semicolon.',
            action='append')
+@utils.arg('--wait', default=False, action="store_true",
+           help='Wait for the stack creation to finish, showing its events.')
 @utils.arg('name', metavar='<STACK_NAME>',
            help='Name of the stack to create.')
 def do_stack_create(hc, args):
@@ -159,7 +218,10 @@ def do_stack_create(hc, args):
     _set_template_fields(hc, args, fields)
     _process_environment_and_files(args, fields)
 
-    hc.stacks.create(**fields)
+    body = hc.stacks.create(**fields)
+    if getattr(args, 'wait', False):
+        stack_id = '%s/%s' % (args.name, body['stack']['id'])
+        _wait_for_stack(hc, stack_id, STACK_CREATE_STATES)
     do_stack_list(hc)
 
 
@@ -231,7 +293,7 @@ def do_stack_show(hc, args):
             'outputs': utils.json_formatter,
             'links': utils.link_formatter
         }
-        utils.print_dict(stack.to_dict(), formatters=formatters)
+        utils.print_dict(stack.to_dict(copy=False), formatters=formatters)
 
 
 @utils.arg('-f', '--template-file', metavar='<FILE>',
@@ -267,6 +329,8 @@ def do_update(hc, args):
            'This can be specified multiple times, or once with parameters '
            'separated by semicolon.',
            action='append')
+@utils.arg('--wait', default=False, action="store_true",
+           help='Wait for the stack update to finish, showing its events.')
 @utils.arg('id', metavar='<NAME or ID>',
            help='Name or ID of stack to update.')
 def do_stack_update(hc, args):
@@ -276,10 +340,39 @@ def do_stack_update(hc, args):
     _set_template_fields(hc, args, fields)
     _process_environment_and_files(args, fields)
 
+    wait = getattr(args, 'wait', False)
+    if wait:
+        # The stack may still show the outcome of an earlier update, so
+        # note its state and last event before updating it
+        try:
+            previous = hc.stacks.get(args.id)
+            last_events = list(hc.events.list(args.id, page_size=1, limit=1,
+                                              sort_dir='desc'))
+        except exc.HTTPNotFound:
+            raise exc.CommandError('Stack not found: %s' % args.id)
+        marker = last_events[0].id if last_events else None
+
     hc.stacks.update(**fields)
+    if wait:
+        _wait_for_stack(hc, args.id, STACK_UPDATE_STATES, marker, previous)
     do_list(hc)
 
 
+def _wait_for_stack(hc, stack_id, target_states, marker=None,
+                    previous=None):
+    try:
+        result = hc.stacks.wait(stack_id, target_states,
+                                event_callback=_print_event,
+                                event_manager=hc.events, marker=marker,
+                                previous=previous)
+    except exc.HTTPNotFound:
+        raise exc.CommandError('Stack not found: %s' % stack_id)
+    stack = result.stack
+    if stack.stack_status != target_states[0]:
+        raise exc.CommandError('Stack %s %s: %s' % (
+            stack_id, stack.stack_status, stack.stack_status_reason))
+
+
 def do_list(hc, args={}):
     '''DEPRECATED! Use stack-list instead.'''
     do_stack_list(hc, args)
@@ -293,17 +386,27 @@ def do_stack_list(hc, args={}):
     utils.print_list(stacks, fields, sortby=3)
 
 
+@utils.arg('--refresh', default=False, action='store_true',
+           help='Fetch the resource types again instead of using the ones '
+           'cached on disk.')
 def do_resource_type_list(hc, args={}):
     '''List the available resource types.'''
+    if getattr(args, 'refresh', False):
+        hc.resource_types.invalidate_cache()
     kwargs = {}
     types = hc.resource_types.list(**kwargs)
     utils.print_list(types, ['resource_type'])
 
 
+@utils.arg('--refresh', default=False, action='store_true',
+           help='Fetch the resource types again instead of using the ones '
+           'cached on disk.')
 @utils.arg('resource_type', metavar='<RESOURCE_TYPE>',
            help='Resource Type to get the details for.')
 def do_resource_type_show(hc, args={}):
     '''Show the resource type.'''
+    if getattr(args, 'refresh', False):
+        hc.resource_types.invalidate_cache()
     try:
         resource_type = hc.resource_types.get(args.resource_type)
     except exc.HTTPNotFound:
@@ -331,7 +434,7 @@ def do_template_show(hc, args):
         raise exc.CommandError('Stack not found: %s' % args.id)
     else:
         if 'heat_template_version' in template:
-            print yaml.safe_dump(template, indent=2)
+            print template_format.yaml_dump(template, indent=2)
         else:
             print json.dumps(template, indent=2)
 
@@ -424,7 +527,7 @@ def do_resource_show(hc, args):
             'links': utils.link_formatter,
             'required_by': utils.newline_list_formatter
         }
-        utils.print_dict(resource.to_dict(), formatters=formatters)
+        utils.print_dict(resource.to_dict(copy=False), formatters=formatters)
 
 
 @utils.arg('resource', metavar='<RESOURCE>',
@@ -466,12 +569,18 @@ def do_resource_metadata(hc, args):
            help='Name or ID of stack to show the events for.')
 @utils.arg('-r', '--resource', metavar='<RESOURCE>',
            help='Name of the resource to filter events by')
+@utils.arg('-f', '--follow', default=False, action="store_true",
+           help='Keep printing new events until the stack is no longer '
+           'in progress')
 def do_event_list(hc, args):
     '''List events for a stack.'''
     fields = {'stack_id': args.id,
               'resource_name': args.resource}
+    if args.follow:
+        _follow_events(hc, fields)
+        return
     try:
-        events = hc.events.list(**fields)
+        events = list(hc.events.list(**fields))
     except exc.HTTPNotFound:
         raise exc.CommandError('Stack not found: %s' % args.id)
     else:
@@ -485,6 +594,23 @@ def do_event_list(hc, args):
         utils.print_list(events, fields)
 
 
+def _follow_events(hc, fields):
+    try:
+        for event in hc.events.watch(**fields):
+            _print_event(event)
+    except exc.HTTPNotFound:
+        raise exc.CommandError('Stack not found: %s' % fields['stack_id'])
+
+
+def _print_event(event):
+    name = getattr(event, 'resource_name', None)
+    if name is None:
+        name = getattr(event, 'logical_resource_id', '')
+    print '%s %s %s %s' % (event.event_time, name,
+                           event.resource_status,
+                           event.resource_status_reason)
+
+
 @utils.arg('id', metavar='<NAME or ID>',
            help='Name or ID of stack to show the events for.')
 @utils.arg('resource', metavar='<RESOURCE>',
@@ -518,4 +644,4 @@ def do_event_show(hc, args):
             'links': utils.link_formatter,
             'resource_properties': utils.json_formatter
         }
-        utils.print_dict(event.to_dict(), formatters=formatters)
+        utils.print_dict(event.to_dict(copy=False), formatters=formatters)
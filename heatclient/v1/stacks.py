@@ -13,9 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+import random
+import time
+
 from heatclient.openstack.common.py3kcompat import urlutils
 
 from heatclient.common import base
+from heatclient import exc
+
+DEFAULT_IDENTIFIER_CACHE_SIZE = 256
+DEFAULT_IDENTIFIER_CACHE_TTL = 300
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_MAX_POLL_INTERVAL = 30
 
 
 class Stack(base.Resource):
@@ -58,9 +68,31 @@ class Stack(base.Resource):
         return '%s/%s' % (self.stack_name, self.id)
 
 
+class StackWaitResult(object):
+    """The outcome of waiting for a stack.
+
+    :param stack: the :class:`Stack` as last polled
+    :param polls: number of status requests made
+    :param elapsed: number of seconds spent waiting
+    """
+
+    def __init__(self, stack, polls, elapsed):
+        self.stack = stack
+        self.polls = polls
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "<StackWaitResult %s polls=%s elapsed=%.1f>" % (
+            self.stack.stack_status, self.polls, self.elapsed)
+
+
 class StackManager(base.Manager):
     resource_class = Stack
 
+    def __init__(self, api, identifier_cache=None):
+        super(StackManager, self).__init__(api)
+        self.identifier_cache = identifier_cache
+
     def list(self, **kwargs):
         """Get a list of stacks.
 
@@ -70,28 +102,13 @@ class StackManager(base.Manager):
                        list than that represented by this stack id
         :param filters: dict of direct comparison filters that mimics the
                         structure of a stack object
+        :param prefetch: number of pages to fetch ahead on a background
+                         thread while the stacks are consumed
+        :param parallel: with page_size and no marker, fetch the pages
+                         concurrently when the server reports the number
+                         of stacks
         :rtype: list of :class:`Stack`
         """
-        absolute_limit = kwargs.get('limit')
-
-        def paginate(qp, seen=0):
-            sort_qp = sorted(qp.items(), key=lambda x: x[0])
-            url = '/stacks?%s' % urlutils.urlencode(sort_qp)
-
-            stacks = self._list(url, "stacks")
-            for stack in stacks:
-                seen += 1
-                if absolute_limit is not None and seen > absolute_limit:
-                    return
-                yield stack
-
-            page_size = qp.get('limit')
-            if (page_size and len(stacks) == page_size and
-                    (absolute_limit is None or 0 < seen < absolute_limit)):
-                qp['marker'] = stack.id
-                for stack in paginate(qp, seen):
-                    yield stack
-
         params = {}
         if 'page_size' in kwargs:
             params['limit'] = kwargs['page_size']
@@ -105,7 +122,61 @@ class StackManager(base.Manager):
             params['property-%s' % key] = value
         params.update(filters)
 
-        return paginate(params)
+        def fetch_page(qp):
+            sort_qp = sorted(qp.items(), key=lambda x: x[0])
+            url = '/stacks?%s' % urlutils.urlencode(sort_qp)
+            return list(self._list_iter(url, "stacks"))
+
+        if (kwargs.get('parallel') and params.get('limit') and
+                'marker' not in params):
+            return self._list_parallel(fetch_page, params, kwargs.get('limit'))
+        return self._paginate(fetch_page, params, kwargs.get('limit'),
+                              kwargs.get('prefetch', 0))
+
+    def _list_parallel(self, fetch_page, params, limit=None):
+        """Fetch the pages of the stack list concurrently.
+
+        The first page is requested along with the count of all the
+        stacks, and the remaining pages by offset on the client's worker
+        threads. The stacks are returned in server order. When the server
+        does not return a count or ignores the offset, the remaining pages
+        are requested one after another by marker instead. Like the other
+        lists, no request is made until the stacks are iterated over.
+        """
+        page_size = params['limit']
+        qp = sorted(dict(params, with_count='true').items())
+        resp, body = self.api.json_request(
+            'GET', '/stacks?%s' % urlutils.urlencode(qp))
+        first = self._objects(body['stacks'])
+        count = body.get('count')
+
+        stacks = self._pages_by_offset(fetch_page, params, first, count, limit)
+        if stacks is None:
+            stacks = first
+            if len(first) == page_size and (limit is None or
+                                            len(first) < limit):
+                params = dict(params, marker=first[-1].id)
+                more = None if limit is None else limit - len(first)
+                stacks = itertools.chain(
+                    first, self._paginate(fetch_page, params, more))
+        for stack in itertools.islice(stacks, limit):
+            yield stack
+
+    def _pages_by_offset(self, fetch_page, params, first, count, limit):
+        page_size = params['limit']
+        if count is None or len(first) < page_size:
+            return None
+        total = count if limit is None else min(count, limit)
+        pages = self._map(
+            lambda offset: fetch_page(dict(params, offset=offset)),
+            range(page_size, total, page_size))
+        for page in pages:
+            if isinstance(page, Exception):
+                raise page
+        if any(page and page[0].id == first[0].id for page in pages):
+            # The offset was ignored
+            return None
+        return itertools.chain(first, *pages)
 
     def create(self, **kwargs):
         """Create a stack."""
@@ -122,6 +193,7 @@ class StackManager(base.Manager):
 
     def delete(self, stack_id):
         """Delete a stack."""
+        forget_stack_id(self.identifier_cache, stack_id)
         self._delete("/stacks/%s" % stack_id)
 
     def get(self, stack_id):
@@ -132,6 +204,123 @@ class StackManager(base.Manager):
         resp, body = self.api.json_request('GET', '/stacks/%s' % stack_id)
         return Stack(self, body['stack'])
 
+    def get_many(self, stack_ids):
+        """Get the metadata for many stacks concurrently.
+
+        :param stack_ids: Stack IDs to lookup
+        :rtype: list of :class:`Stack`, in the order of stack_ids, with
+                the exception raised in place of each stack which could
+                not be fetched
+        """
+        return self._map(self.get, stack_ids)
+
+    def wait(self, stack_id, target_states=None, timeout=None,
+             poll_interval=DEFAULT_POLL_INTERVAL,
+             max_poll_interval=DEFAULT_MAX_POLL_INTERVAL,
+             event_callback=None, event_manager=None, marker=None,
+             previous=None):
+        """Wait for a stack to reach one of the target states.
+
+        After the first poll the status is read from the stack list
+        filtered on the stack id, which leaves out the parameters and
+        outputs, unless the server ignores the filter. The polling
+        interval doubles, with random jitter, up to max_poll_interval, and
+        is reset whenever new events arrive.
+
+        When waiting for an action on an existing stack, pass the stack as
+        it was before the action as previous: the stack may still be in
+        the target state of an earlier action when it is first polled, so
+        a target state only counts once the stack has been seen in
+        progress, its updated_time has changed or new events arrived.
+
+        :param stack_id: Stack ID to wait for
+        :param target_states: stack_status values to wait for, by default
+                              any status which is not *_IN_PROGRESS. The
+                              wait also ends on any other status which is
+                              not *_IN_PROGRESS, e.g. CREATE_FAILED, since
+                              the stack will not leave it on its own.
+        :param timeout: maximum number of seconds to wait, or None to wait
+                        indefinitely
+        :param event_callback: optional callable to which each new event
+                               of the stack is passed while waiting
+        :param event_manager: the EventManager of the client, used to list
+                              the events passed to event_callback
+        :param marker: ID of the newest event before the action, only the
+                       later events are passed to event_callback
+        :param previous: the :class:`Stack` as it was before the action
+        :rtype: :class:`StackWaitResult`
+        :raises: :class:`heatclient.exc.Timeout` if the stack does not
+                 reach a target state in time
+        """
+        # NOTE: imported here since the events module imports this one
+        from heatclient.v1 import events
+
+        start = time.time()
+        if event_manager is None and event_callback is not None:
+            event_manager = events.EventManager(self.api,
+                                                self.identifier_cache)
+        changed = previous is None
+        stack = None
+        by_list = True
+        polls = 0
+        interval = poll_interval
+        # IDs of the events passed on, in case the server ignores the marker
+        seen = set()
+        while True:
+            if event_callback is not None:
+                new_events = [event for event in event_manager.list(
+                    stack_id, marker=marker, sort_dir='asc')
+                    if event.id not in seen]
+                for event in new_events:
+                    seen.add(event.id)
+                    event_callback(event)
+                if new_events:
+                    marker = new_events[-1].id
+                    interval = poll_interval
+                    changed = True
+
+            stack, by_list = self._poll(stack_id, stack, by_list)
+            polls += 1
+            status = stack.stack_status
+            if not changed:
+                changed = (status.endswith('_IN_PROGRESS') or
+                           getattr(stack, 'updated_time', None) !=
+                           getattr(previous, 'updated_time', None))
+            done = not status.endswith('_IN_PROGRESS')
+            if target_states is not None and status in target_states:
+                done = True
+            elapsed = time.time() - start
+            if done and changed:
+                return StackWaitResult(stack, polls, elapsed)
+
+            if timeout is not None:
+                if elapsed >= timeout:
+                    raise exc.Timeout('Timed out waiting for stack %s, '
+                                      'status is %s' % (stack_id, status))
+                interval = min(interval, timeout - elapsed)
+            time.sleep(interval * random.uniform(0.5, 1.0))
+            interval = min(interval * 2, max_poll_interval)
+
+    def _poll(self, stack_id, stack=None, by_list=True):
+        """Get the summary of a stack, with its status.
+
+        :returns: tuple of the stack and whether to poll it by the stack
+                  list again
+        """
+        if stack is None:
+            return self.get(stack_id), by_list
+        if by_list:
+            url = '/stacks?%s' % urlutils.urlencode([('id', stack.id)])
+            summaries = self._list(url, "stacks")
+            if len(summaries) > 1:
+                # The filter was ignored, a GET costs less than the list
+                by_list = False
+            for summary in summaries:
+                if summary.id == stack.id:
+                    return summary, by_list
+        # Deleted stacks are not listed
+        return self.get(stack.identifier), by_list
+
     def template(self, stack_id):
         """Get the template content for a specific stack as a parsed JSON
         object.
@@ -150,12 +339,48 @@ class StackManager(base.Manager):
 
 class StackChildManager(base.Manager):
 
+    def __init__(self, api, identifier_cache=None):
+        super(StackChildManager, self).__init__(api)
+        self.identifier_cache = identifier_cache
+
     def _resolve_stack_id(self, stack_id):
         # if the id already has a slash in it,
         # then it is already {stack_name}/{stack_id}
         if stack_id.find('/') > 0:
             return stack_id
+        if self.identifier_cache is not None:
+            identifier = self.identifier_cache.get(stack_id)
+            if identifier is not None:
+                return identifier
         resp, body = self.api.json_request('GET',
                                            '/stacks/%s' % stack_id)
         stack = body['stack']
-        return '%s/%s' % (stack['stack_name'], stack['id'])
+        identifier = '%s/%s' % (stack['stack_name'], stack['id'])
+        if self.identifier_cache is not None:
+            self.identifier_cache.set(stack_id, identifier)
+        return identifier
+
+    def _forget_stack_id(self, stack_id):
+        forget_stack_id(self.identifier_cache, stack_id)
+
+
+def forget_stack_id(identifier_cache, stack_id):
+    """Drop every cached identifier of a stack.
+
+    :param identifier_cache: cache of stack names and ids to
+                             {stack_name}/{stack_id} identifiers, or None
+    :param stack_id: name, ID or identifier of the stack
+    """
+    if identifier_cache is None:
+        return
+    keys = set(stack_id.split('/'))
+    identifier = identifier_cache.pop(stack_id)
+    if identifier is not None:
+        keys.update(identifier.split('/'))
+
+    def matches(key, value):
+        # A name and an id of the same stack may be cached apart, so
+        # entries are matched on both parts of their identifier.
+        return key in keys or keys.intersection(value.split('/'))
+
+    identifier_cache.pop_matching(matches)